@@ -0,0 +1,255 @@
+"""Batch winnability analysis over seeded deals.
+
+    python analyze.py 0 100000 -o results.jsonl
+
+Each seed is dealt exactly as the table deals it and solved headlessly on a
+process pool. Results are appended as they arrive, so an interrupted run can
+be restarted with the same command and only the missing seeds are solved.
+"""
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import csv
+import json
+import os
+import sys
+import time
+
+import engine
+from solver import DEFAULT_NODE_LIMIT, DEFAULT_TIME_LIMIT, Solver
+
+FIELDS = ["seed", "solvable", "nodes", "time", "moves"]
+
+
+def solve_seeds(seeds, node_limit, time_limit):
+    """Worker entry point: solve a batch of seeds, return one record each."""
+    solver = Solver(node_limit=node_limit, time_limit=time_limit)
+    records = []
+    for seed in seeds:
+        result = solver.solve(engine.deal(engine.new_deck(seed)))
+        records.append(
+            {
+                "seed": seed,
+                "solvable": result.solvable,
+                "nodes": result.nodes,
+                "time": round(result.elapsed, 6),
+                "moves": len(result.moves) if result.solvable else None,
+            }
+        )
+    return records
+
+
+def output_format(path, requested=None):
+    if requested:
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def parse_solvable(value):
+    return {"True": True, "False": False}.get(value)
+
+
+def read_results(path, fmt):
+    """Yield the records already written to `path`, skipping a torn last line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                try:
+                    yield {
+                        "seed": int(row["seed"]),
+                        "solvable": parse_solvable(row["solvable"]),
+                        "nodes": int(row["nodes"]),
+                        "time": float(row["time"]),
+                        "moves": int(row["moves"]) if row["moves"] else None,
+                    }
+                except (KeyError, TypeError, ValueError):
+                    continue
+        else:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def completed_seeds(path, fmt):
+    """Seeds with a decided result; undecided ones are tried again."""
+    return {
+        record["seed"]
+        for record in read_results(path, fmt)
+        if record["solvable"] is not None
+    }
+
+
+def latest_results(records):
+    """One record per seed: the last decided one, else the last undecided one.
+
+    A rerun with a bigger budget appends a new record for each seed it
+    retries, after the undecided one it replaces.
+    """
+    results = {}
+    for record in records:
+        previous = results.get(record["seed"])
+        if (
+            previous is None
+            or record["solvable"] is not None
+            or previous["solvable"] is None
+        ):
+            results[record["seed"]] = record
+    return list(results.values())
+
+
+class ResultWriter:
+    def __init__(self, path, fmt):
+        self.fmt = fmt
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="")
+        if fmt == "csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if new_file:
+                self.csv_writer.writeheader()
+
+    def write(self, records):
+        for record in records:
+            if self.fmt == "csv":
+                self.csv_writer.writerow(record)
+            else:
+                self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def batched(seeds, size):
+    batch = []
+    for seed in seeds:
+        batch.append(seed)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def analyze(
+    start,
+    stop,
+    output,
+    fmt=None,
+    workers=None,
+    batch_size=16,
+    node_limit=DEFAULT_NODE_LIMIT,
+    time_limit=DEFAULT_TIME_LIMIT,
+    progress=None,
+):
+    """Solve seeds in [start, stop) not yet decided in `output`; return counts."""
+    fmt = output_format(output, fmt)
+    workers = workers or os.cpu_count() or 1
+    done = completed_seeds(output, fmt)
+    pending = (seed for seed in range(start, stop) if seed not in done)
+    batches = batched(pending, batch_size)
+
+    counts = {"solved": 0, "solvable": 0, "unsolvable": 0, "unknown": 0}
+    writer = ResultWriter(output, fmt)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            # Keep every worker busy without queueing millions of futures
+            max_in_flight = workers * 4
+
+            def submit_next():
+                batch = next(batches, None)
+                if batch is not None:
+                    in_flight.add(
+                        executor.submit(solve_seeds, batch, node_limit, time_limit)
+                    )
+                return batch is not None
+
+            while len(in_flight) < max_in_flight and submit_next():
+                pass
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    in_flight.discard(future)
+                    records = future.result()
+                    writer.write(records)
+                    for record in records:
+                        counts["solved"] += 1
+                        if record["solvable"] is None:
+                            counts["unknown"] += 1
+                        elif record["solvable"]:
+                            counts["solvable"] += 1
+                        else:
+                            counts["unsolvable"] += 1
+                    if progress:
+                        progress(counts)
+                    submit_next()
+    finally:
+        writer.close()
+    return counts
+
+
+def summarize(path, fmt=None):
+    fmt = output_format(path, fmt)
+    total = solvable = unknown = 0
+    for record in latest_results(read_results(path, fmt)):
+        total += 1
+        if record["solvable"] is None:
+            unknown += 1
+        elif record["solvable"]:
+            solvable += 1
+    return total, solvable, unknown
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Solve a range of seeded Patience deals and record which are winnable."
+    )
+    parser.add_argument("start", type=int, help="first seed (inclusive)")
+    parser.add_argument("stop", type=int, help="last seed (exclusive)")
+    parser.add_argument(
+        "-o", "--output", default="results.jsonl", help="JSONL or CSV results file"
+    )
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="output format")
+    parser.add_argument(
+        "-j", "--workers", type=int, help="worker processes (default: every core)"
+    )
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--node-limit", type=int, default=DEFAULT_NODE_LIMIT)
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(counts):
+        elapsed = time.perf_counter() - started
+        rate = counts["solved"] / elapsed if elapsed else 0.0
+        print(f"\r{counts['solved']} deals, {rate:.1f}/s", end="", file=sys.stderr)
+
+    analyze(
+        args.start,
+        args.stop,
+        args.output,
+        fmt=args.format,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        node_limit=args.node_limit,
+        time_limit=args.time_limit,
+        progress=progress,
+    )
+
+    total, solvable, unknown = summarize(args.output, args.format)
+    print(file=sys.stderr)
+    if total:
+        print(
+            f"{solvable}/{total} deals winnable ({100 * solvable / total:.1f}%), "
+            f"{unknown} undecided within the search budget"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from collections import deque, namedtuple
+import time
+
+FRAME_MS = 16
+
+# Move a canvas item from `start` to `end` over `duration` seconds
+Tween = namedtuple("Tween", ["canvas", "item", "start", "end", "duration"])
+
+
+class Animator:
+    """Runs a queue of animation steps on a single frame clock.
+
+    A step is a callable run when the previous one has finished. It may
+    return a Tween, which is advanced once per frame, or None to continue
+    straight to the next step. Only one after() callback is ever pending,
+    so cancel() stops everything at once.
+    """
+
+    def __init__(self, master, frame_ms=FRAME_MS):
+        self.master = master
+        self.frame_ms = frame_ms
+        self.steps = deque()
+        self.tween = None
+        self.tween_started = 0.0
+        self.after_id = None
+
+    @property
+    def running(self):
+        return self.after_id is not None or self.tween is not None or bool(self.steps)
+
+    def run(self, steps):
+        self.cancel()
+        self.steps.extend(steps)
+        self.tick()
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.master.after_cancel(self.after_id)
+            self.after_id = None
+        self.steps.clear()
+        self.tween = None
+
+    def land(self):
+        """Put the item in flight at its end point now; later steps still run."""
+        if self.tween is not None:
+            self.tween.canvas.coords(self.tween.item, *self.tween.end)
+            self.tween = None
+
+    def tick(self):
+        self.after_id = None
+        now = time.perf_counter()
+
+        if self.tween is not None:
+            canvas, item, (x0, y0), (x1, y1), duration = self.tween
+            progress = (now - self.tween_started) / duration if duration > 0 else 1.0
+            if progress >= 1.0:
+                canvas.coords(item, x1, y1)
+                self.tween = None
+            else:
+                canvas.coords(
+                    item, x0 + (x1 - x0) * progress, y0 + (y1 - y0) * progress
+                )
+
+        while self.tween is None and self.steps:
+            tween = self.steps.popleft()()
+            if tween is not None:
+                self.tween = tween
+                self.tween_started = now
+                tween.canvas.coords(tween.item, *tween.start)
+
+        if self.tween is not None or self.steps:
+            self.after_id = self.master.after(self.frame_ms, self.tick)
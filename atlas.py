@@ -0,0 +1,121 @@
+"""Pre-scaled card atlas.
+
+    python atlas.py
+
+packs every card face, already resized for the default zoom level and one
+step either side, into one uncompressed RGBA file that the game memory-maps
+at startup instead of decoding 52 PNGs. Other zoom levels are resized from
+the PNGs when first needed. The file starts with a magic line and a JSON header giving
+each level's size and byte offset into the pixel data, which starts at the
+next 16 byte boundary. Cards are stored in card-code order within a level.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+import engine
+
+MAGIC = b"PATLAS1\n"
+ATLAS_PATH = "images/cards.atlas"
+
+BASE_CARD_SIZE = (80, 120)
+ZOOM_STEP = 1.2
+# Zoom in stops once past 2.0 and zoom out once under 0.5
+ZOOM_LEVELS = [ZOOM_STEP**k for k in range(-4, 5)]
+# A onefile build unpacks the atlas on every launch, so it only holds the
+# sizes a session is likely to start at: all nine would be ~27 MB
+ATLAS_LEVELS = [ZOOM_STEP**k for k in range(-1, 2)]
+
+
+def data_start(header_length):
+    return -(-(len(MAGIC) + 4 + header_length) // 16) * 16
+
+
+def card_size(zoom_factor):
+    width, height = BASE_CARD_SIZE
+    return round(width * zoom_factor), round(height * zoom_factor)
+
+
+class CardAtlas:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[: len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a card atlas")
+        (header_length,) = struct.unpack_from("<I", self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self.map[start : start + header_length])
+        self.cards = header["cards"]
+        pixels = data_start(header_length)
+        self.levels = {
+            (level["width"], level["height"]): pixels + level["offset"]
+            for level in header["levels"]
+        }
+
+    @classmethod
+    def open(cls, path):
+        """Return the atlas at `path`, or None when it is missing or unreadable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def has_size(self, width, height):
+        return (width, height) in self.levels
+
+    def card_image(self, card, width, height):
+        """Slice one card out of the mapped file without copying it."""
+        from PIL import Image
+
+        size = width * height * 4
+        offset = self.levels[(width, height)] + card * size
+        buffer = memoryview(self.map)[offset : offset + size]
+        return Image.frombuffer("RGBA", (width, height), buffer, "raw", "RGBA", 0, 1)
+
+    def close(self):
+        self.map.close()
+
+
+def build(image_path, output, zoom_levels=ATLAS_LEVELS):
+    from PIL import Image
+
+    sources = [Image.open(image_path(card)).convert("RGBA") for card in range(52)]
+    sizes = sorted({card_size(zoom) for zoom in zoom_levels})
+
+    levels = []
+    offset = 0
+    for width, height in sizes:
+        levels.append({"width": width, "height": height, "offset": offset})
+        offset += 52 * width * height * 4
+
+    header = json.dumps({"cards": 52, "levels": levels}).encode()
+
+    with open(output, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start(len(header)) - f.tell()))
+        for width, height in sizes:
+            for source in sources:
+                f.write(source.resize((width, height), Image.LANCZOS).tobytes())
+    return sizes
+
+
+def png_path(card):
+    rank, suit = engine.card_rank(card), engine.card_suit(card)
+    return os.path.join("images", f"{rank}_of_{suit}.png")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    output = argv[0] if argv else ATLAS_PATH
+    sizes = build(png_path, output)
+    print(f"Wrote {output}: {len(sizes)} sizes, {os.path.getsize(output)} bytes")
+
+
+if __name__ == "__main__":
+    main()
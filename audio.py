@@ -0,0 +1,114 @@
+import hashlib
+import os
+import time
+
+SOUNDS = {"card_deal": "sounds/card_deal.mp3"}
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".patience_cache")
+
+CHANNELS = 4
+# Plays of the same sound closer together than this are dropped
+MIN_INTERVAL = 0.04
+
+
+class SoundBank:
+    """Sound effects that cost nothing until they are first heard.
+
+    The mixer is initialised on the first unmuted play. Decoded PCM is kept in
+    memory and written to CACHE_DIR, keyed by the mixer format and a hash of
+    the MP3, so each MP3 is decoded once per machine. Sounds play on a small
+    pool of reserved channels; when all are busy the oldest play is replaced,
+    and repeats of a sound within MIN_INTERVAL are skipped.
+    """
+
+    def __init__(self, resource_path, muted=False, channels=CHANNELS):
+        self.resource_path = resource_path
+        self.muted = muted
+        self.channel_count = channels
+        self.mixer = None
+        self.mixer_failed = False  # Not retried: there may be no audio device
+        self.channels = []
+        self.started = []  # When each channel last started playing
+        self.sounds = {}
+        self.last_played = {}
+
+    def init_mixer(self):
+        if self.mixer is not None:
+            return True
+        if self.mixer_failed:
+            return False
+        try:
+            import pygame
+
+            pygame.mixer.init()
+            pygame.mixer.set_reserved(self.channel_count)
+        except Exception:
+            print("Failed to initialise audio")
+            self.mixer_failed = True
+            return False
+        self.mixer = pygame.mixer
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        self.started = [0.0] * self.channel_count
+        return True
+
+    def cache_path(self, name):
+        frequency, size, channels = self.mixer.get_init()
+        # Keyed on the MP3's contents, as a release may ship a different one
+        # under the same name, and a packaged build's files get a new mtime
+        # each time they are unpacked. Hashing is far cheaper than decoding.
+        with open(self.resource_path(SOUNDS[name]), "rb") as f:
+            source = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+        return os.path.join(
+            CACHE_DIR, f"{name}-{source}-{frequency}-{size}-{channels}.pcm"
+        )
+
+    def load(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            return sound
+
+        cache_path = self.cache_path(name)
+        try:
+            with open(cache_path, "rb") as f:
+                sound = self.mixer.Sound(buffer=f.read())
+        except OSError:
+            sound = self.mixer.Sound(self.resource_path(SOUNDS[name]))
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(cache_path + ".tmp", "wb") as f:
+                    f.write(sound.get_raw())
+                os.replace(cache_path + ".tmp", cache_path)
+            except OSError:
+                pass  # Caching is only an optimisation
+
+        self.sounds[name] = sound
+        return sound
+
+    def play(self, name):
+        if self.muted:
+            return
+        now = time.perf_counter()
+        if now - self.last_played.get(name, 0.0) < MIN_INTERVAL:
+            return
+        if not self.init_mixer():
+            return
+        sound = self.load(name)
+        self.last_played[name] = now
+
+        index = next(
+            (i for i, channel in enumerate(self.channels) if not channel.get_busy()),
+            None,
+        )
+        if index is None:
+            index = self.started.index(min(self.started))
+        self.channels[index].play(sound)
+        self.started[index] = now
+
+    def stop(self):
+        for channel in self.channels:
+            channel.stop()
+
+    def set_muted(self, muted):
+        self.muted = muted
+        if muted:
+            self.stop()
@@ -0,0 +1,506 @@
+"""Headless benchmarks for the engine, rendering and asset hot paths.
+
+    python benchmark.py -o results.json
+    python benchmark.py --baseline baseline.json
+
+The game's own methods run on a PatienceGame wired to a stub canvas that
+records every call, so no display is needed; --tk uses a real canvas
+instead when one is available. Without a display, PhotoImage creation is
+replaced by a pixel copy of the same image, which keeps decode and resize
+costs in the numbers.
+
+Results are JSON: for each benchmark the fastest of several rounds in
+seconds per operation and, where it makes sense, a rate or the number of
+canvas calls made. With
+--baseline, results are compared against an earlier run and the exit
+status is 1 if anything got slower than the tolerance allows.
+"""
+
+import argparse
+from collections import Counter
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import types
+
+import engine
+import layout
+from atlas import ATLAS_PATH, CardAtlas, card_size
+from image_cache import CardImageCache
+from solver import Solver
+
+REPEAT = 9
+# Calls per round for operations that take well under a millisecond
+FAST_NUMBER = 100
+POSITION_COUNT = 200
+SOLVER_SEEDS = range(8)
+SOLVER_NODE_LIMIT = 20000
+# Timings on a busy machine easily swing by a third, so only flag clear slowdowns
+DEFAULT_TOLERANCE = 0.5
+
+
+class StubCanvas:
+    """Just enough of tk.Canvas for the renderer and drag code, counting calls."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.next_id = 1
+        self.items = {}  # item -> [x, y], in stacking order bottom first
+        self.tags = {}  # item -> set of tags
+
+    def resolve(self, tag_or_id):
+        if isinstance(tag_or_id, int):
+            return [tag_or_id] if tag_or_id in self.items else []
+        return [item for item in self.items if tag_or_id in self.tags[item]]
+
+    def create_image(self, x, y, image=None, anchor=None, tags=()):
+        self.calls["create_image"] += 1
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = [x, y]
+        self.tags[item] = {tags} if isinstance(tags, str) else set(tags)
+        return item
+
+    def coords(self, item, *position):
+        self.calls["coords"] += 1
+        if position:
+            self.items[item][:] = position
+        return list(self.items[item])
+
+    def move(self, tag_or_id, dx, dy):
+        self.calls["move"] += 1
+        for item in self.resolve(tag_or_id):
+            position = self.items[item]
+            position[0] += dx
+            position[1] += dy
+
+    def tag_raise(self, tag_or_id):
+        self.calls["tag_raise"] += 1
+        for item in self.resolve(tag_or_id):
+            self.items[item] = self.items.pop(item)
+
+    def addtag_withtag(self, tag, tag_or_id):
+        self.calls["addtag_withtag"] += 1
+        for item in self.resolve(tag_or_id):
+            self.tags[item].add(tag)
+
+    def dtag(self, tag_or_id, tag):
+        self.calls["dtag"] += 1
+        for item in self.resolve(tag_or_id):
+            self.tags[item].discard(tag)
+
+    def delete(self, tag_or_id):
+        self.calls["delete"] += 1
+        for item in self.resolve(tag_or_id):
+            del self.items[item]
+            del self.tags[item]
+
+    def itemconfig(self, item, **options):
+        self.calls["itemconfig"] += 1
+
+    def winfo_height(self):
+        return 800
+
+
+class StubMaster:
+    def __init__(self):
+        self.next_id = 1
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        return f"after#{self.next_id}"
+
+    def after_cancel(self, after_id):
+        pass
+
+
+def make_game(canvas, master, images=None):
+    """A PatienceGame with only the state the measured methods use."""
+    from game import PatienceGame
+
+    game = PatienceGame.__new__(PatienceGame)
+    game.master = master
+    game.init_table(canvas, 1.0, canvas.winfo_height())
+    game.card_images = images or {card: None for card in range(52)}
+    game.renderer.set_images(game.card_images)
+    return game
+
+
+def make_tk_canvas():
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.withdraw()
+    canvas = tk.Canvas(root, width=1200, height=800)
+    return canvas, root
+
+
+def long_column_state():
+    """Every card in four long houses, each a 13-card descending run."""
+    houses = [()] * engine.HOUSE_COUNT
+    for column, first_suit in enumerate([0, 1, 2, 3]):
+        other = [2, 3, 0, 1][first_suit]  # Alternate red and black
+        houses[column] = tuple(
+            (first_suit if rank % 2 else other) * 13 + rank - 1
+            for rank in range(13, 0, -1)
+        )
+    return engine.State(tuple(houses), engine.EMPTY_STATE.end_houses)
+
+
+def sample_positions(count=POSITION_COUNT, seed=0):
+    """Positions reached by random play from seeded deals, reproducibly."""
+    rng = random.Random(seed)
+    positions = []
+    deal = 0
+    while len(positions) < count:
+        state = engine.deal(engine.new_deck(deal))
+        deal += 1
+        for _ in range(rng.randrange(0, 40)):
+            moves = engine.legal_moves(state)
+            if not moves:
+                break
+            state = engine.apply_move(state, rng.choice(moves))
+        positions.append(state)
+    return positions
+
+
+def measure(run, setup=None, repeat=REPEAT, number=1):
+    """Seconds per call of run(context), with setup() outside the timing.
+
+    Each of `repeat` rounds times `number` calls, each on its own context,
+    with the garbage collector off as timeit does. The fastest round is
+    reported, since noise from other processes only ever adds time.
+    """
+    times = []
+    for _ in range(repeat):
+        contexts = [setup() if setup else None for _ in range(number)]
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for context in contexts:
+                run(context)
+            times.append((time.perf_counter() - start) / number)
+        finally:
+            gc.enable()
+    return min(times)
+
+
+def bench_display_cards(new_canvas, master, results):
+    dealt = engine.deal(engine.new_deck(0))
+    boards = {"full": dealt, "long": long_column_state()}
+
+    for name, state in boards.items():
+
+        def fresh():
+            game = make_game(new_canvas(), master)
+            game.set_state(state)
+            return game
+
+        def rendered():
+            game = fresh()
+            game.display_cards()
+            calls = getattr(game.game_canvas, "calls", None)
+            if calls is not None:
+                calls.clear()
+            return game
+
+        results[f"display_cards_{name}_cold"] = {
+            "seconds": measure(
+                lambda game: game.display_cards(), fresh, number=FAST_NUMBER
+            )
+        }
+        results[f"display_cards_{name}_unchanged"] = {
+            "seconds": measure(
+                lambda game: game.display_cards(), rendered, number=FAST_NUMBER
+            )
+        }
+
+        moves = [move for move in engine.legal_moves(state) if move.index > 0]
+        if moves:
+            move = moves[0]
+
+            def after_move(game):
+                game.move_card(move)
+                game.display_cards()
+
+            game = rendered()
+            after_move(game)
+            calls = getattr(game.game_canvas, "calls", None)
+            results[f"display_cards_{name}_move"] = {
+                "seconds": measure(after_move, rendered, number=FAST_NUMBER),
+                "canvas_calls": sum(calls.values()) if calls is not None else None,
+            }
+
+
+def bench_card_images(master, results):
+    from game import PatienceGame
+
+    atlas_path = PatienceGame.resource_path(ATLAS_PATH)
+    sources = {"png": lambda: None}
+    if os.path.exists(atlas_path):
+        sources["atlas"] = lambda: CardAtlas.open(atlas_path)
+
+    for name, open_atlas in sources.items():
+
+        def fresh():
+            game = make_game(StubCanvas(), master)
+            game.image_cache = CardImageCache(
+                game.card_image_path, range(52), atlas=open_atlas()
+            )
+            return game
+
+        def warm():
+            game = fresh()
+            game.load_card_images()
+            return game
+
+        def load(game):
+            game.load_card_images()
+
+        results[f"load_card_images_{name}_cold"] = {
+            "seconds": measure(load, fresh, repeat=3)
+        }
+        game = warm()
+        results[f"load_card_images_{name}_warm"] = {
+            "seconds": measure(lambda _: load(game), number=1000)
+        }
+
+
+def bench_drag(new_canvas, master, results, frames=60, events_per_frame=4):
+    state = engine.deal(engine.new_deck(0))
+
+    def ready():
+        game = make_game(new_canvas(), master)
+        game.set_state(state)
+        game.display_cards()
+        return game
+
+    def drag(game):
+        house = max(range(engine.HOUSE_COUNT), key=lambda i: len(game.state.houses[i]))
+        x, y = game.game_canvas.coords(game.get_card_item(game.state.houses[house][-1]))
+        press = types.SimpleNamespace(x=x + 5, y=y + 5)
+        game.on_card_press(press)
+        for frame in range(frames):
+            for step in range(events_per_frame):
+                offset = frame * events_per_frame + step
+                game.on_card_motion(types.SimpleNamespace(x=x + offset, y=y + offset))
+            game.flush_drag()  # What the pending after() would run
+        game.game_canvas.dtag("drag", "drag")
+
+    results["drag"] = {
+        "seconds": measure(drag, ready, number=10),
+        "motion_events": frames * events_per_frame,
+    }
+
+
+def bench_hit_test(results, positions):
+    """Picks at every card and drops at every column, long columns included."""
+    table = make_game(StubCanvas(), StubMaster()).layout
+    states = [long_column_state()] + positions
+    points = [
+        (state, x + 5, y + 5)
+        for state in states
+        for group in table.card_groups(state)[: engine.HOUSE_COUNT]
+        for card, x, y in group
+    ]
+
+    def pick_and_drop(_):
+        for state, x, y in points:
+            table.card_at(state, x, y)
+            table.drop_target(state, x, y)
+
+    seconds = measure(pick_and_drop, number=10)
+    results["hit_test"] = {
+        "seconds": seconds / len(points),
+        "per_second": len(points) / seconds,
+    }
+
+    # What a zoom or window resize costs before anything is redrawn
+    width, height = card_size(1.0)
+    results["layout_build"] = {
+        "seconds": measure(lambda _: layout.Layout(width, height, 1.0, 800), number=10)
+    }
+
+
+def bench_rules(results, positions):
+    games = []
+    for state in positions:
+        game = make_game(StubCanvas(), StubMaster())
+        game.set_state(state)
+        games.append(game)
+    candidates = [
+        [
+            engine.make_move(state, source, index, target)
+            for source, house in enumerate(state.houses)
+            for index in range(len(house))
+            for target in range(engine.HOUSE_COUNT + engine.END_HOUSE_COUNT)
+        ]
+        for state in positions
+    ]
+
+    def validate_all(_):
+        for game, moves in zip(games, candidates):
+            for move in moves:
+                game.is_valid_move(move)
+
+    def game_over_all(_):
+        for game in games:
+            game.is_game_over()
+
+    checks = sum(len(moves) for moves in candidates)
+    seconds = measure(validate_all)
+    results["move_validation"] = {
+        "seconds": seconds / checks,
+        "per_second": checks / seconds,
+    }
+    seconds = measure(game_over_all, number=10)
+    results["is_game_over"] = {
+        "seconds": seconds / len(games),
+        "per_second": len(games) / seconds,
+    }
+
+    # A move plus the incremental index updates that follow it
+    playable = [
+        (state, engine.legal_moves(state)[0])
+        for state in positions
+        if engine.has_legal_move(state)
+    ]
+
+    def ready():
+        state, move = playable[ready.next % len(playable)]
+        ready.next += 1
+        game = make_game(StubCanvas(), StubMaster())
+        game.set_state(state)
+        return game, move
+
+    ready.next = 0
+    results["move_card"] = {
+        "seconds": measure(
+            lambda context: context[0].move_card(context[1]),
+            ready,
+            number=len(playable),
+        )
+    }
+
+
+def bench_solver(results):
+    solver = Solver(node_limit=SOLVER_NODE_LIMIT, time_limit=None)
+    states = [engine.deal(engine.new_deck(seed)) for seed in SOLVER_SEEDS]
+    nodes = 0
+    elapsed = 0.0
+    for state in states:
+        result = min(
+            (solver.solve(state) for _ in range(3)), key=lambda result: result.elapsed
+        )
+        nodes += result.nodes
+        elapsed += result.elapsed
+    results["solver"] = {
+        "seconds": elapsed / len(SOLVER_SEEDS),
+        "positions_per_second": nodes / elapsed,
+        "positions": nodes,
+    }
+
+
+def run(use_tk=False):
+    results = {}
+    if use_tk:
+        canvas, root = make_tk_canvas()
+
+        def new_canvas():
+            canvas.delete("all")
+            return canvas
+
+        master = root
+    else:
+        import PIL.ImageTk
+
+        # Needs a Tk interpreter; copying the pixels costs about the same
+        PIL.ImageTk.PhotoImage = lambda image: image.copy()
+        new_canvas = StubCanvas
+        master = StubMaster()
+
+    bench_display_cards(new_canvas, master, results)
+    bench_card_images(master, results)
+    bench_drag(new_canvas, master, results)
+    positions = sample_positions()
+    bench_hit_test(results, positions)
+    bench_rules(results, positions)
+    bench_solver(results)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "canvas": "tk" if use_tk else "stub",
+            "photo_image": "tk" if use_tk else "stub",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return (name, metric, baseline value, current value) for each regression."""
+    regressions = []
+    for name, metrics in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        for metric, value in metrics.items():
+            before = old.get(metric)
+            if not isinstance(value, (int, float)) or not before:
+                continue
+            if metric == "seconds" or metric == "canvas_calls":
+                worse = value > before * (1 + tolerance)
+            elif metric.endswith("per_second"):
+                worse = value < before / (1 + tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append((name, metric, before, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed slowdown before failing, as a fraction (default: 0.5)",
+    )
+    parser.add_argument(
+        "--tk", action="store_true", help="use a real Tk canvas (needs a display)"
+    )
+    args = parser.parse_args(argv)
+
+    current = run(use_tk=args.tk)
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        for name, metric, before, after in regressions:
+            print(
+                f"REGRESSION {name} {metric}: {before:.6g} -> {after:.6g}",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+        print("No regressions against the baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
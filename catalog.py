@@ -0,0 +1,223 @@
+"""Precomputed catalog of numbered deals.
+
+    python analyze.py 0 5000 -o results.jsonl
+    python catalog.py results.jsonl
+
+turns analysis results into one memory-mapped, column-oriented file. Deal
+number N is engine.new_deck(N). After the magic and a fixed header come
+four little-endian columns, each starting on an 8 byte boundary:
+
+    solvable       int8   per deal: 1 winnable, 0 not, -1 unknown
+    moves          uint16 per deal: best-known solution length, 0 if none
+    difficulty     uint8  per deal: 0-100 for winnable deals, else 255
+    by_difficulty  uint32 per winnable deal: deal offsets sorted by difficulty
+
+followed by `starts`, 102 uint32 values where by_difficulty[starts[d]:
+starts[d + 1]] holds the deals of difficulty d, so picking a winnable deal in
+a difficulty band is two lookups.
+"""
+
+from collections import namedtuple
+import array
+import mmap
+import random
+import struct
+import sys
+
+MAGIC = b"PDEALS1\n"
+HEADER = struct.Struct("<III")  # first deal number, deal count, winnable count
+CATALOG_PATH = "data/deals.catalog"
+
+UNRATED = 255
+DIFFICULTIES = {"easy": (0, 34), "medium": (34, 67), "hard": (67, 101)}
+
+DealInfo = namedtuple("DealInfo", ["number", "solvable", "moves", "difficulty"])
+
+
+def aligned(offset):
+    return -(-offset // 8) * 8
+
+
+def column_offsets(count, winnable):
+    """Byte offsets of each column, and the total file size."""
+    offsets = {}
+    offset = len(MAGIC) + HEADER.size
+    for name, size in (
+        ("solvable", count),
+        ("moves", 2 * count),
+        ("difficulty", count),
+        ("by_difficulty", 4 * winnable),
+        ("starts", 4 * 102),
+    ):
+        offset = aligned(offset)
+        offsets[name] = offset
+        offset += size
+    return offsets, offset
+
+
+class DealCatalog:
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("the deal catalog is stored little-endian")
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[: len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a deal catalog")
+        self.first, self.count, self.winnable = HEADER.unpack_from(self.map, len(MAGIC))
+        offsets, size = column_offsets(self.count, self.winnable)
+        if len(self.map) < size:
+            self.map.close()
+            raise ValueError(f"{path} is truncated")
+
+        view = memoryview(self.map)
+        self.solvable = view[offsets["solvable"] :][: self.count].cast("b")
+        self.moves = view[offsets["moves"] :][: 2 * self.count].cast("H")
+        self.difficulty = view[offsets["difficulty"] :][: self.count]
+        self.by_difficulty = view[offsets["by_difficulty"] :][: 4 * self.winnable].cast(
+            "I"
+        )
+        self.starts = view[offsets["starts"] :][: 4 * 102].cast("I")
+
+    @classmethod
+    def open(cls, path):
+        """Return the catalog at `path`, or None when it is missing or unreadable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, number):
+        return self.first <= number < self.first + self.count
+
+    def info(self, number):
+        """DealInfo for deal `number`, or None if it is not in the catalog."""
+        if number not in self:
+            return None
+        i = number - self.first
+        solvable = {1: True, 0: False}.get(self.solvable[i])
+        difficulty = self.difficulty[i]
+        return DealInfo(
+            number,
+            solvable,
+            self.moves[i] or None,
+            None if difficulty == UNRATED else difficulty,
+        )
+
+    def pick(self, difficulty=None, rng=random):
+        """A random winnable deal number, optionally within a DIFFICULTIES band.
+
+        Returns None when no catalogued deal matches.
+        """
+        low, high = DIFFICULTIES[difficulty] if difficulty else (0, 101)
+        start, stop = self.starts[low], self.starts[high]
+        if start == stop:
+            return None
+        return self.first + self.by_difficulty[rng.randrange(start, stop)]
+
+    def close(self):
+        for column in (
+            self.solvable,
+            self.moves,
+            self.difficulty,
+            self.by_difficulty,
+            self.starts,
+        ):
+            column.release()
+        self.map.close()
+
+
+def rate(records):
+    """Difficulty 0-100 of each winnable record: its percentile of search effort.
+
+    The solver's node count tracks how much a deal resists being solved far
+    better than its solution length does, which mostly reflects the layout.
+    """
+    winnable = sorted(
+        (record for record in records if record["solvable"]),
+        key=lambda record: (record["nodes"], record["moves"] or 0),
+    )
+    last = max(len(winnable) - 1, 1)
+    return {record["seed"]: round(100 * i / last) for i, record in enumerate(winnable)}
+
+
+def build(records, output):
+    records = list(records)
+    if not records:
+        raise ValueError("no analysis results to catalog")
+    first = min(record["seed"] for record in records)
+    count = max(record["seed"] for record in records) - first + 1
+    ratings = rate(records)
+
+    solvable = array.array("b", [-1] * count)
+    moves = array.array("H", [0] * count)
+    difficulty = array.array("B", [UNRATED] * count)
+    for record in records:
+        i = record["seed"] - first
+        if record["solvable"] is not None:
+            solvable[i] = int(record["solvable"])
+        if record["solvable"]:
+            moves[i] = min(record["moves"] or 0, 0xFFFF)
+            difficulty[i] = ratings[record["seed"]]
+
+    by_difficulty = array.array(
+        "I",
+        sorted(
+            (i for i in range(count) if difficulty[i] != UNRATED),
+            key=lambda i: (difficulty[i], i),
+        ),
+    )
+    starts = array.array("I", [0] * 102)
+    for i in by_difficulty:
+        starts[difficulty[i] + 1] += 1
+    for d in range(1, 102):
+        starts[d] += starts[d - 1]
+
+    offsets, size = column_offsets(count, len(by_difficulty))
+    columns = {
+        "solvable": solvable,
+        "moves": moves,
+        "difficulty": difficulty,
+        "by_difficulty": by_difficulty,
+        "starts": starts,
+    }
+    if sys.byteorder != "little":
+        for column in columns.values():
+            column.byteswap()
+
+    with open(output, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(first, count, len(by_difficulty)))
+        for name, column in columns.items():
+            f.write(b"\0" * (offsets[name] - f.tell()))
+            column.tofile(f)
+    return count, len(by_difficulty)
+
+
+def main(argv=None):
+    import argparse
+    import os
+
+    from analyze import latest_results, output_format, read_results
+
+    parser = argparse.ArgumentParser(
+        description="Build the deal catalog from analyze.py results."
+    )
+    parser.add_argument("results", help="JSONL or CSV file written by analyze.py")
+    parser.add_argument("-o", "--output", default=CATALOG_PATH)
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="results format")
+    args = parser.parse_args(argv)
+
+    records = latest_results(
+        read_results(args.results, output_format(args.results, args.format))
+    )
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    count, winnable = build(records, args.output)
+    print(f"Wrote {args.output}: {count} deals, {winnable} winnable")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Headless rules engine for Patience.
+
+Cards are small integer codes (0-51) and a position is an immutable, hashable
+State, so nothing in here needs Tk, PIL or pygame. The GUI drives the game
+through these functions, and analysis code can use them directly.
+"""
+
+from collections import namedtuple
+import random
+
+SUITS = ["hearts", "diamonds", "clubs", "spades"]
+RANKS = list(range(1, 14))
+
+HOUSE_COUNT = 10
+END_HOUSE_COUNT = 4
+HOUSE_CARD_COUNTS = [8, 8, 8, 7, 6, 5, 4, 3, 2, 1]
+
+# Move targets below FOUNDATION are houses, FOUNDATION + suit is an end house
+FOUNDATION = HOUSE_COUNT
+
+# A position: `houses` is a tuple of 10 tuples of card codes (bottom first),
+# `end_houses` is a tuple of 4 counts, one per suit, of cards on the foundation.
+State = namedtuple("State", ["houses", "end_houses"])
+
+# A move of `count` cards from houses[source][index:] onto `target`
+Move = namedtuple("Move", ["source", "index", "target", "count"])
+
+EMPTY_STATE = State(((),) * HOUSE_COUNT, (0,) * END_HOUSE_COUNT)
+
+
+def card_code(suit, rank):
+    return SUITS.index(suit) * 13 + rank - 1
+
+
+def card_suit(code):
+    return SUITS[code // 13]
+
+
+def card_rank(code):
+    return code % 13 + 1
+
+
+def card_color(code):
+    return "red" if code < 26 else "black"
+
+
+def card_name(code):
+    return f"{card_rank(code)} of {card_suit(code)}"
+
+
+# Lookup tables so the hot paths never do arithmetic on card codes
+RANK = [card_rank(code) for code in range(52)]
+RED = [code < 26 for code in range(52)]
+# ACCEPTS[code] holds the cards `code` may be stacked onto in a house
+ACCEPTS = [
+    tuple(
+        other
+        for other in range(52)
+        if RANK[other] == RANK[code] + 1 and RED[other] != RED[code]
+    )
+    for code in range(52)
+]
+
+
+def new_deck(seed=None):
+    """Return the 52 card codes shuffled, reproducibly when `seed` is given."""
+    deck = list(range(52))
+    random.Random(seed).shuffle(deck)
+    return deck
+
+
+def add_card(state, house_index, code):
+    houses = list(state.houses)
+    houses[house_index] = houses[house_index] + (code,)
+    return State(tuple(houses), state.end_houses)
+
+
+def deal(deck):
+    """Deal `deck` the way the table does: popping from the end, house by house."""
+    deck = list(deck)
+    houses = []
+    for count in HOUSE_CARD_COUNTS:
+        houses.append(tuple(deck.pop() for _ in range(count)))
+    return State(tuple(houses), EMPTY_STATE.end_houses)
+
+
+def can_stack(code, onto):
+    return RANK[code] == RANK[onto] - 1 and RED[code] != RED[onto]
+
+
+def run_length(house):
+    """Length of the descending, alternating-colour run at the top of `house`."""
+    if not house:
+        return 0
+    length = 1
+    for i in range(len(house) - 1, 0, -1):
+        if not can_stack(house[i], house[i - 1]):
+            break
+        length += 1
+    return length
+
+
+def is_complete_house(house):
+    if len(house) != 13 or RANK[house[0]] != 13:
+        return False
+    return all(RANK[house[i]] == RANK[house[i - 1]] - 1 for i in range(1, 13))
+
+
+def make_move(state, source, index, target):
+    """Build the Move that takes houses[source][index:] to `target`."""
+    return Move(source, index, target, len(state.houses[source]) - index)
+
+
+def is_valid_move(state, move):
+    houses, end_houses = state
+    source, index, target, count = move
+    if source == target or not 0 <= source < HOUSE_COUNT:
+        return False
+    house = houses[source]
+    if not 0 <= index < len(house) or len(house) - index != count:
+        return False
+    if count > run_length(house):
+        return False
+    code = house[index]
+
+    if target >= FOUNDATION:
+        suit = target - FOUNDATION
+        return (
+            count == 1
+            and suit < END_HOUSE_COUNT
+            and code // 13 == suit
+            and RANK[code] == end_houses[suit] + 1
+        )
+
+    target_house = houses[target]
+    if not target_house:  # Any card can be placed on an empty house
+        return True
+    return target_house[-1] in ACCEPTS[code]
+
+
+def legal_moves(state):
+    houses, end_houses = state
+    tops = {}
+    empty = []
+    for i, house in enumerate(houses):
+        if house:
+            tops[house[-1]] = i
+        else:
+            empty.append(i)
+
+    moves = []
+    for source, house in enumerate(houses):
+        if not house:
+            continue
+        size = len(house)
+        top = house[-1]
+        suit = top // 13
+        if RANK[top] == end_houses[suit] + 1:
+            moves.append(Move(source, size - 1, FOUNDATION + suit, 1))
+
+        for index in range(size - run_length(house), size):
+            code = house[index]
+            count = size - index
+            for onto in ACCEPTS[code]:
+                target = tops.get(onto)
+                if target is not None:
+                    moves.append(Move(source, index, target, count))
+            for target in empty:
+                moves.append(Move(source, index, target, count))
+    return moves
+
+
+def has_legal_move(state):
+    houses, end_houses = state
+    if any(not house for house in houses):
+        return any(houses)
+    tops = {house[-1] for house in houses}
+    for house in houses:
+        top = house[-1]
+        if RANK[top] == end_houses[top // 13] + 1:
+            return True
+        size = len(house)
+        for index in range(size - run_length(house), size):
+            if any(onto in tops for onto in ACCEPTS[house[index]]):
+                return True
+    return False
+
+
+def apply_move(state, move):
+    houses, end_houses = state
+    source, index, target, count = move
+    new_houses = list(houses)
+    new_houses[source] = houses[source][:index]
+    if target >= FOUNDATION:
+        new_end_houses = list(end_houses)
+        new_end_houses[target - FOUNDATION] += 1
+        return State(tuple(new_houses), tuple(new_end_houses))
+    new_houses[target] = houses[target] + houses[source][index:]
+    return State(tuple(new_houses), end_houses)
+
+
+def unapply_move(state, move):
+    """Return the state `move` was applied to."""
+    houses, end_houses = state
+    source, index, target, count = move
+    new_houses = list(houses)
+    if target >= FOUNDATION:
+        suit = target - FOUNDATION
+        new_houses[source] = houses[source] + (suit * 13 + end_houses[suit] - 1,)
+        new_end_houses = list(end_houses)
+        new_end_houses[suit] -= 1
+        return State(tuple(new_houses), tuple(new_end_houses))
+    new_houses[source] = houses[source] + houses[target][-count:]
+    new_houses[target] = houses[target][:-count]
+    return State(tuple(new_houses), end_houses)
+
+
+def completed_houses(state):
+    return sum(1 for house in state.houses if is_complete_house(house))
+
+
+def is_won(state):
+    """Every card is either on an end house or in a King-to-Ace house."""
+    return sum(state.end_houses) + 13 * completed_houses(state) == 52
+
+
+def is_forced_win(state):
+    """Every house is a single run, so the rest of the game plays itself.
+
+    The lowest card left is then always on top of its house, and every lower
+    card is already on an end house, so it can always be played off next.
+    """
+    return all(run_length(house) == len(house) for house in state.houses)
+
+
+def finishing_moves(state):
+    """Moves playing every card off to the end houses from a forced win."""
+    houses, end_houses = state
+    houses = [list(house) for house in houses]
+    moves = []
+    while True:
+        sources = [i for i, house in enumerate(houses) if house]
+        if not sources:
+            return moves
+        source = min(sources, key=lambda i: RANK[houses[i][-1]])
+        code = houses[source].pop()
+        moves.append(Move(source, len(houses[source]), FOUNDATION + code // 13, 1))
+
+
+def is_safe_to_play_off(state, code):
+    """Whether playing `code` to its end house can never cost a move.
+
+    A card is only ever needed to stack the next lower rank of the other
+    colour on, and cards never leave the end houses, so once both suits of
+    that colour are played up to that rank the card has no further use.
+    """
+    rank = RANK[code]
+    others = (2, 3) if RED[code] else (0, 1)
+    return rank <= 2 or all(state.end_houses[suit] >= rank - 1 for suit in others)
+
+
+def find_safe_move(state):
+    """First safe move to an end house, or None.
+
+    Complete King-to-Ace houses are left alone, as they already count.
+    """
+    houses, end_houses = state
+    for source, house in enumerate(houses):
+        if not house or is_complete_house(house):
+            continue
+        code = house[-1]
+        suit = code // 13
+        if RANK[code] == end_houses[suit] + 1 and is_safe_to_play_off(state, code):
+            return Move(source, len(house) - 1, FOUNDATION + suit, 1)
+    return None
+
+
+def safe_moves(state):
+    """Safe moves to the end houses, repeated until none is left."""
+    moves = []
+    while True:
+        move = find_safe_move(state)
+        if move is None:
+            return moves
+        moves.append(move)
+        state = apply_move(state, move)
+
+
+def end_house_cards(state, suit):
+    return [suit * 13 + rank - 1 for rank in range(1, state.end_houses[suit] + 1)]
+
+
+class MoveIndex:
+    """Per-house metadata and legal moves, kept in step with a State.
+
+    Houses left untouched by a change are the very same tuples in the old and
+    new State, so an update only revisits houses that changed: their run
+    lengths, completeness and outgoing moves are recomputed, and other houses
+    only re-check their moves onto the changed ones. Win, stuck and movable
+    checks are then constant-time lookups.
+    """
+
+    def __init__(self, state=EMPTY_STATE):
+        self.state = EMPTY_STATE
+        self.runs = [0] * HOUSE_COUNT
+        self.complete = [False] * HOUSE_COUNT
+        self.completed = 0  # Complete King-to-Ace houses
+        self.moves_from = [[] for _ in range(HOUSE_COUNT)]
+        self.move_count = 0
+        self.update(state)
+
+    def update(self, state):
+        old = self.state
+        self.state = state
+        changed = [
+            i
+            for i, (before, after) in enumerate(zip(old.houses, state.houses))
+            if before is not after
+        ]
+        if not changed and old.end_houses == state.end_houses:
+            return
+
+        for i in changed:
+            house = state.houses[i]
+            self.runs[i] = run_length(house)
+            complete = is_complete_house(house)
+            self.completed += complete - self.complete[i]
+            self.complete[i] = complete
+
+        for source in range(HOUSE_COUNT):
+            if source in changed:
+                moves = self.source_moves(source, range(HOUSE_COUNT))
+            else:
+                # The foundation move is redone too, as end_houses may differ
+                moves = [
+                    move
+                    for move in self.moves_from[source]
+                    if move.target < FOUNDATION and move.target not in changed
+                ]
+                moves.extend(self.source_moves(source, changed))
+            self.move_count += len(moves) - len(self.moves_from[source])
+            self.moves_from[source] = moves
+
+    def source_moves(self, source, targets):
+        """Moves out of `source` onto a foundation or one of `targets`."""
+        houses, end_houses = self.state
+        house = houses[source]
+        if not house:
+            return []
+        size = len(house)
+        moves = []
+        top = house[-1]
+        if RANK[top] == end_houses[top // 13] + 1:
+            moves.append(Move(source, size - 1, FOUNDATION + top // 13, 1))
+        run_start = size - self.runs[source]
+        for target in targets:
+            if target == source:
+                continue
+            target_house = houses[target]
+            for index in range(run_start, size):
+                if not target_house or target_house[-1] in ACCEPTS[house[index]]:
+                    moves.append(Move(source, index, target, size - index))
+        return moves
+
+    def is_won(self):
+        return sum(self.state.end_houses) + 13 * self.completed == 52
+
+    def has_legal_move(self):
+        return self.move_count > 0
+
+    def is_forced_win(self):
+        return all(
+            run == len(house) for run, house in zip(self.runs, self.state.houses)
+        )
+
+    def is_legal(self, move):
+        return 0 <= move.source < HOUSE_COUNT and move in self.moves_from[move.source]
+
+    def is_movable(self, house_index, index):
+        """Whether houses[house_index][index:] is a run that may be picked up."""
+        house = self.state.houses[house_index]
+        return 0 <= index < len(house) and len(house) - index <= self.runs[house_index]
+
+    def legal_moves(self):
+        return [move for moves in self.moves_from for move in moves]
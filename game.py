@@ -1,84 +1,110 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import random
 from rules import RulesManager
 import os
 import sys
-import pygame
 from updater import Updater
 from tkinter import messagebox
 from win_celebration import create_win_celebration
+import engine
+from renderer import CardRenderer
+from history import MoveHistory
+from animation import Animator, Tween
+from audio import SoundBank
+from image_cache import CardImageCache
+from atlas import ATLAS_PATH, CardAtlas, card_size
+from catalog import CATALOG_PATH, DIFFICULTIES, DealCatalog
+from startup_profile import profiler
+from perf_hud import PerfHUD, perf
+from replay import GameRecorder
+from hints import HintEngine
+import layout
+from math import pi, sin
+import random
+import time
 
+CURRENT_VERSION = "v1.0.26-alpha"
 
-# from solver import Solver, GameState
-import signal
-import json
+# Dragging repaints at most once per display frame (~60 Hz)
+DRAG_FRAME_MS = 16
 
-CURRENT_VERSION = "v1.0.26-alpha"
+# Seconds each dealt card takes to fly to its house; "instant" skips animation
+DEAL_SPEEDS = {"normal": 0.1, "fast": 0.025, "instant": 0.0}
+
+# Choices for how long the hint search may run, in seconds
+HINT_TIMES = [1.0, 2.0, 5.0, 10.0]
 
+# Random deals are numbered from 0 to DEAL_COUNT - 1
+DEAL_COUNT = 1000000
 
-class Card:
-    def __init__(self, suit, rank, image):
-        self.suit = suit
-        self.rank = rank
-        self.color = "red" if suit in ["hearts", "diamonds"] else "black"
-        self.image = image
-        self.cards_above = []  # Cards stacked on top of this card
+# Memory cap for card images kept for recently used zoom levels
+IMAGE_CACHE_BYTES = 48 * 1024 * 1024
 
 
 class PatienceGame:
-    def __init__(self, master):
+    def __init__(self, master, check_updates=True):
         self.master = master
+        self.check_updates = check_updates
         self.master.title("Patience Card Game")
 
+        # The update check starts once the window is up, see load_assets
         self.updater = Updater(CURRENT_VERSION, self.master)
-        self.updater.start_update_check_thread()
 
-        pygame.mixer.init()
-        sound_path = self.resource_path("sounds/card_deal.mp3")
-        self.deal_sound = pygame.mixer.Sound(sound_path)
+        # Nothing is initialised or decoded until a sound is first heard
+        with profiler.phase("audio"):
+            self.audio = SoundBank(self.resource_path, muted=True)
 
-        self.rules_manager = RulesManager(self.master)
+        with profiler.phase("preferences"):
+            self.rules_manager = RulesManager(self.master)
 
-        self.card_width = 80
-        self.card_height = 120
+        self.image_cache = CardImageCache(
+            self.card_image_path,
+            range(52),
+            max_bytes=IMAGE_CACHE_BYTES,
+            atlas=CardAtlas.open(self.resource_path(ATLAS_PATH)),
+        )
+        # Only mapped here; deal lookups read just the pages they touch
+        self.deal_catalog = DealCatalog.open(self.resource_path(CATALOG_PATH))
 
+        widgets_started = time.perf_counter()
         self.center_window(1200, 800)
         self.create_menu()
         self.create_game_area()
         self.create_status_bar()
-        self.move_history = []
+        self.move_history = MoveHistory()
+        self.recorder = GameRecorder()
         self.move_count = 0
 
         self.high_score = self.rules_manager.get_high_score()
         self.create_high_score_label()
 
-        self.card_images = self.load_card_images()
-        self.houses = [[] for _ in range(10)]
-        self.end_houses = [[] for _ in range(4)]
-        self.card_items = {}
-        self.drag_data = {"x": 0, "y": 0, "item": None}
-
         self.initial_deck = None
+        self.deal_number = None
+        self.next_deal_number = None  # Chosen from the menu, else random
         self.interrupt_flag = False
 
         self.status_var.set("Welcome to Patience! Click 'Deal Cards' to begin.")
 
         self.highlight_rectangles = []
         self.strobe_after_id = None
+        # The worker process only starts once a position is searched
+        self.hint_engine = HintEngine(
+            self.master,
+            time_budget=self.rules_manager.get_hint_time(),
+            on_result=self.on_hint_result,
+        )
 
-        self.zoom_factor = self.rules_manager.get_zoom_factor()
         self.create_control_buttons()
 
         self.master.after(100, self.rules_manager.show_rules)
 
         self.master.bind("<Escape>", self.handle_escape)
         self.master.bind("<F11>", lambda event: self.toggle_fullscreen())
-
-        self.rules_manager = RulesManager(self.master)
-        self.zoom_factor = self.rules_manager.get_zoom_factor()
-        self.apply_zoom()
+        self.perf_hud = PerfHUD(self.master, self.game_canvas)
+        self.master.bind("<F12>", lambda event: self.perf_hud.toggle())
+        self.master.bind("<Control-F12>", lambda event: self.toggle_trace_recording())
+        # A trace started from the command line needs the heartbeat too
+        self.perf_hud.update_heartbeat()
 
         self.win_celebration = create_win_celebration(self)
 
@@ -94,6 +120,54 @@ class PatienceGame:
 
         self.apply_mute_state()
 
+        # Dealing waits for the card images
+        self.deal_button.config(state=tk.DISABLED)
+        profiler.record("widgets", widgets_started)
+
+        # Let Tk draw the window before loading assets
+        self.widgets_done = time.perf_counter()
+        self.master.after_idle(lambda: self.master.after(0, self.load_assets))
+
+    def load_assets(self):
+        profiler.record("first paint", self.widgets_done)
+
+        # The table and house outlines are already up; the faces are decoded
+        # on worker threads and dealing waits for them
+        self.images_started = time.perf_counter()
+        self.status_var.set("Loading cards...")
+        self.image_cache.load_in_background(
+            self.card_width,
+            self.card_height,
+            self.master,
+            self.on_card_images_loaded,
+            self.show_loading_progress,
+            self.on_card_images_failed,
+        )
+
+        if self.check_updates:
+            self.updater.start_update_check_thread()
+
+    def show_loading_progress(self, done, total):
+        if self.status_var.get().startswith("Loading cards"):
+            self.status_var.set(f"Loading cards... {done}/{total}")
+
+    def on_card_images_loaded(self, images):
+        profiler.record("images", self.images_started)
+        if not self.card_images:  # Unless a zoom already loaded another size
+            self.card_images = images
+            self.renderer.set_images(images)
+            self.display_cards()
+        if self.status_var.get().startswith("Loading cards"):
+            self.status_var.set("Welcome to Patience! Click 'Deal Cards' to begin.")
+        if not self.interrupt_flag:
+            self.deal_button.config(state=tk.NORMAL)
+        profiler.finish()
+
+    def on_card_images_failed(self, error):
+        profiler.record("images", self.images_started)
+        self.status_var.set(f"Could not load the card images: {error}")
+        profiler.finish()
+
     @staticmethod
     def resource_path(relative_path):
         """Get absolute path to resource, works for dev and for PyInstaller"""
@@ -105,39 +179,14 @@ class PatienceGame:
 
         return os.path.join(base_path, relative_path)
 
-    def load_card_images(self):
-        suits = ["hearts", "diamonds", "clubs", "spades"]
-        ranks = list(range(1, 14))
-        card_images = {}
-
-        for suit in suits:
-            for rank in ranks:
-                image_path = self.resource_path(f"images/{rank}_of_{suit}.png")
-                image = Image.open(image_path)
-                image = image.resize((self.card_width, self.card_height), Image.LANCZOS)
-                card_images[(suit, rank)] = ImageTk.PhotoImage(image)
-
-        return card_images
-
-    def load_high_score(self):
-        try:
-            with open("patience_preferences.json", "r") as f:
-                preferences = json.load(f)
-                return preferences.get("high_score", 0)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return 0
+    def card_image_path(self, card):
+        rank, suit = engine.card_rank(card), engine.card_suit(card)
+        return self.resource_path(f"images/{rank}_of_{suit}.png")
 
-    def save_high_score(self):
-        try:
-            with open("patience_preferences.json", "r") as f:
-                preferences = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            preferences = {}
-
-        preferences["high_score"] = max(self.high_score, self.move_count)
-
-        with open("patience_preferences.json", "w") as f:
-            json.dump(preferences, f)
+    def load_card_images(self):
+        # Sizes seen recently come straight from the cache
+        with perf.span("load_card_images"):
+            return self.image_cache.get_images(self.card_width, self.card_height)
 
     def create_high_score_label(self):
         self.high_score_label = ttk.Label(
@@ -151,9 +200,6 @@ class PatienceGame:
             self.rules_manager.set_high_score(self.high_score)
             self.high_score_label.config(text=f"High Score: {self.high_score}")
 
-    def quit_game(self):
-        os.kill(os.getpid(), signal.SIGTERM)
-
     def update_move_count(self):
         self.move_count += 1
         self.move_counter_label.config(text=f"Moves: {self.move_count}")
@@ -171,7 +217,18 @@ class PatienceGame:
         self.update_check_button.pack(side=tk.BOTTOM, pady=5)
 
     def manual_update_check(self):
-        if not self.updater.check_for_updates():
+        self.update_check_button.config(state=tk.DISABLED, text="Checking...")
+        self.updater.check_in_background(self.show_update_check_result, force=True)
+
+    def show_update_check_result(self, info):
+        self.update_check_button.config(state=tk.NORMAL, text="Check for Updates")
+        if info.error:
+            messagebox.showwarning(
+                "Update Check Failed", "Could not reach GitHub. Try again later."
+            )
+        elif info.available:
+            self.updater.notify_update_available(info.version, info.url)
+        else:
             messagebox.showinfo("No Updates", "You are running the latest version.")
 
     def create_zoom_buttons(self):
@@ -188,17 +245,6 @@ class PatienceGame:
         )
         self.zoom_out_button.pack(side=tk.LEFT, padx=5)
 
-    def apply_zoom(self):
-        self.card_width = int(80 * self.zoom_factor)
-        self.card_height = int(120 * self.zoom_factor)
-        self.card_images = self.load_card_images()
-        self.create_house_areas()
-        self.display_cards()
-
-        # Ensure window decorations are shown when not in fullscreen
-        if not self.master.attributes("-fullscreen"):
-            self.master.overrideredirect(False)
-
     def zoom_in(self):
         if self.zoom_factor < 2.0:  # Limit max zoom
             self.zoom_factor *= 1.2
@@ -214,10 +260,13 @@ class PatienceGame:
             self.display_cards()
 
     def resize_cards(self):
-        self.card_width = int(80 * self.zoom_factor)
-        self.card_height = int(120 * self.zoom_factor)
+        self.skip_auto_moves()
+        self.animator.land()  # A dealt card in flight would land on the old layout
+        self.card_width, self.card_height = card_size(self.zoom_factor)
+        self.update_layout()
         self.card_images = self.load_card_images()
-        self.create_house_areas()  # Add this line
+        self.renderer.set_images(self.card_images)
+        self.create_house_areas()
 
     def center_window(self, width, height):
         screen_width = self.master.winfo_screenwidth()
@@ -234,14 +283,78 @@ class PatienceGame:
         menu_bar.add_cascade(label="Game", menu=game_menu)
         game_menu.add_command(label="New Game", command=self.new_game)
         game_menu.add_command(label="Restart", command=self.restart_game)
+
+        deal_menu = tk.Menu(game_menu, tearoff=0)
+        game_menu.add_cascade(label="Choose Deal", menu=deal_menu)
+        for difficulty in DIFFICULTIES:
+            deal_menu.add_command(
+                label=f"Winnable, {difficulty}",
+                command=lambda difficulty=difficulty: self.choose_winnable_deal(
+                    difficulty
+                ),
+                state=tk.NORMAL if self.deal_catalog else tk.DISABLED,
+            )
+        deal_menu.add_command(label="Deal Number...", command=self.ask_deal_number)
+
         game_menu.add_command(label="Show Rules", command=self.rules_manager.show_rules)
         game_menu.add_command(label="Toggle Fullscreen", command=self.toggle_fullscreen)
+
+        self.deal_speed_var = tk.StringVar(value=self.rules_manager.get_deal_speed())
+        deal_speed_menu = tk.Menu(game_menu, tearoff=0)
+        game_menu.add_cascade(label="Deal Speed", menu=deal_speed_menu)
+        for speed in DEAL_SPEEDS:
+            deal_speed_menu.add_radiobutton(
+                label=speed.capitalize(),
+                value=speed,
+                variable=self.deal_speed_var,
+                command=lambda: self.rules_manager.set_deal_speed(
+                    self.deal_speed_var.get()
+                ),
+            )
+
+        self.hint_time_var = tk.DoubleVar(value=self.rules_manager.get_hint_time())
+        hint_time_menu = tk.Menu(game_menu, tearoff=0)
+        game_menu.add_cascade(label="Hint Thinking Time", menu=hint_time_menu)
+        for seconds in HINT_TIMES:
+            hint_time_menu.add_radiobutton(
+                label=f"{seconds:g} seconds",
+                value=seconds,
+                variable=self.hint_time_var,
+                command=self.set_hint_time,
+            )
+
+        self.auto_play_var = tk.BooleanVar(value=self.rules_manager.get_auto_play())
+        game_menu.add_checkbutton(
+            label="Auto-Play Safe Moves",
+            variable=self.auto_play_var,
+            command=lambda: self.rules_manager.set_auto_play(self.auto_play_var.get()),
+        )
+
         game_menu.add_separator()
         game_menu.add_command(label="Quit", command=self.on_closing)
 
+    def set_hint_time(self):
+        seconds = self.hint_time_var.get()
+        self.rules_manager.set_hint_time(seconds)
+        self.hint_engine.time_budget = seconds
+        # Searches under the old budget are stale
+        asked = self.hint_engine.cancel()
+        if not self.hint_button.instate(["!disabled"]):
+            return
+        if asked:
+            self.hint_engine.hint(self.state, self.show_hint_result)
+        else:
+            self.hint_engine.prefetch(self.state)
+
     def on_closing(self):
-        pygame.mixer.stop()
-        self.rules_manager.save_preferences()
+        self.finish_recording()
+        self.hint_engine.close()
+        self.image_cache.close()
+        if perf.recording:
+            perf.stop_recording()
+        self.updater.stop_update_check_thread()
+        self.audio.stop()
+        self.rules_manager.flush()
         self.master.destroy()
 
     def create_game_area(self):
@@ -251,13 +364,58 @@ class PatienceGame:
         self.game_canvas = tk.Canvas(self.game_frame, bg="#076324")
         self.game_canvas.pack(fill=tk.BOTH, expand=True)
 
+        # Bound once on the tag, so every card item created later picks them up
+        self.game_canvas.tag_bind("card", "<ButtonPress-1>", self.on_card_press)
+        self.game_canvas.tag_bind("card", "<ButtonRelease-1>", self.on_card_release)
+        self.game_canvas.tag_bind("card", "<B1-Motion>", self.on_card_motion)
+        self.game_canvas.bind("<Configure>", self.on_canvas_resize)
+
+        # Size the cards for the saved zoom up front so they load only once.
+        # The canvas height is not known until the canvas is mapped.
+        self.init_table(self.game_canvas, self.rules_manager.get_zoom_factor())
         self.create_house_areas()
 
+    def init_table(self, canvas, zoom_factor, canvas_height=None):
+        """Set up the cards, position, layout and drag state on `canvas`.
+
+        Nothing else is needed to render, drag and make moves, so the
+        benchmark builds its games with just this.
+        """
+        self.game_canvas = canvas
+        self.zoom_factor = zoom_factor
+        self.card_width, self.card_height = card_size(zoom_factor)
+        self.canvas_height = canvas_height
+        self.update_layout()
+
+        self.card_images = {}  # Loaded by load_assets after the first paint
+        self.state = engine.EMPTY_STATE
+        self.move_index = engine.MoveIndex()
+        self.renderer = CardRenderer(canvas, self.card_images)
+        self.drag_data = {"x": 0, "y": 0, "item": None}
+        self.drag_after_id = None
+        self.animator = Animator(self.master)
+        self.auto_flight = None  # (cards, on_finish) while auto moves animate
+        self.dealing = False  # Cards stay put until the deal has finished
+
+    def update_layout(self):
+        """Work out the table geometry again, after a zoom or canvas resize."""
+        self.layout = layout.Layout(
+            self.card_width, self.card_height, self.zoom_factor, self.canvas_height
+        )
+
+    def on_canvas_resize(self, event):
+        if event.height == self.canvas_height:
+            return
+        self.canvas_height = event.height
+        self.skip_auto_moves()
+        self.animator.land()
+        self.update_layout()
+        self.create_house_areas()  # The end houses follow the canvas height
+        self.display_cards()  # Only columns whose spacing changed move
+
     def create_house_areas(self):
         self.game_canvas.delete("house_area")
-        for i in range(10):  # Change back to 10 houses
-            x = 60 + i * (self.card_width + 20)
-            y = 20
+        for x, y in self.layout.house_slots() + self.layout.end_house_slots():
             self.game_canvas.create_rectangle(
                 x,
                 y,
@@ -267,6 +425,7 @@ class PatienceGame:
                 width=2,
                 tags="house_area",
             )
+        self.game_canvas.tag_lower("house_area")  # Keep outlines under the cards
 
     def create_status_bar(self):
         status_frame = ttk.Frame(self.master)
@@ -282,13 +441,20 @@ class PatienceGame:
         self.move_counter_label = ttk.Label(status_frame, text="Moves: 0", anchor=tk.E)
         self.move_counter_label.pack(side=tk.RIGHT, padx=5)
 
+        # Kept up to date in the background after every move
+        self.winnable_label = ttk.Label(status_frame, text="", anchor=tk.E)
+        self.winnable_label.pack(side=tk.RIGHT, padx=5)
+        self.lost_at = None  # (move, exact) at which the game was lost, once found
+
     def new_game(self):
         self.clear_board()
         self.initial_deck = None
+        self.next_deal_number = None
         self.status_var.set("New game started. Click 'Deal Cards' to begin.")
         self.redeal_button.config(state=tk.DISABLED)  # Disable redeal button
         self.move_history.clear()
         self.undo_button.config(state=tk.DISABLED)
+        self.redo_button.config(state=tk.DISABLED)
         self.move_count = 0
         self.move_counter_label.config(text="Moves: 0")
 
@@ -307,16 +473,21 @@ class PatienceGame:
         self.redeal_button.pack(side=tk.LEFT, padx=5)
         self.redeal_button.config(state=tk.DISABLED)  # Initially disabled
 
-        # self.hint_button = ttk.Button(
-        #     control_frame, text="Hint", command=self.show_hint
-        # )
-        # self.hint_button.pack(side=tk.LEFT, padx=5)
+        self.hint_button = ttk.Button(
+            control_frame, text="Hint", command=self.show_hint, state=tk.DISABLED
+        )
+        self.hint_button.pack(side=tk.LEFT, padx=5)
 
         self.undo_button = ttk.Button(
             control_frame, text="Undo", command=self.undo_move, state=tk.DISABLED
         )
         self.undo_button.pack(side=tk.LEFT, padx=5)
 
+        self.redo_button = ttk.Button(
+            control_frame, text="Redo", command=self.redo_move, state=tk.DISABLED
+        )
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+
         self.clear_button = ttk.Button(
             control_frame, text="Clear Board", command=self.clear_board
         )
@@ -346,7 +517,7 @@ class PatienceGame:
         self.fullscreen_button.pack(side=tk.LEFT, padx=5)
 
         self.quit_button = ttk.Button(
-            control_frame, text="Quit", command=self.quit_game
+            control_frame, text="Quit", command=self.on_closing
         )
         self.quit_button.pack(side=tk.LEFT, padx=5)
 
@@ -356,19 +527,52 @@ class PatienceGame:
         self.new_game()
         self.initial_deck = None
         self.status_var.set("Game restarted. Click 'Deal Cards' to begin.")
-        # self.hint_button.config(state=tk.DISABLED)
+        self.hint_button.config(state=tk.DISABLED)
         self.redeal_button.config(state=tk.DISABLED)  # Disable redeal button
 
     def create_deck(self):
-        suits = ["hearts", "diamonds", "clubs", "spades"]
-        ranks = list(range(1, 14))
-        deck = [
-            Card(suit, rank, self.card_images[(suit, rank)])
-            for suit in suits
-            for rank in ranks
-        ]
-        random.shuffle(deck)
-        return deck
+        if self.next_deal_number is None:
+            self.deal_number = random.randrange(DEAL_COUNT)
+        else:
+            self.deal_number = self.next_deal_number
+            self.next_deal_number = None
+        return engine.new_deck(self.deal_number)
+
+    def describe_deal(self, number):
+        info = self.deal_catalog.info(number) if self.deal_catalog else None
+        if info is None or info.solvable is None:
+            return f"Deal #{number}"
+        if not info.solvable:
+            return f"Deal #{number} (not winnable)"
+        band = next(
+            name
+            for name, (low, high) in DIFFICULTIES.items()
+            if low <= info.difficulty < high
+        )
+        return f"Deal #{number} (winnable, {band}, solved in {info.moves} moves)"
+
+    def choose_deal(self, number):
+        self.new_game()
+        self.next_deal_number = number
+        self.status_var.set(
+            f"{self.describe_deal(number)} is next. Click 'Deal Cards' to begin."
+        )
+
+    def choose_winnable_deal(self, difficulty):
+        number = self.deal_catalog.pick(difficulty)
+        if number is None:
+            self.status_var.set(f"No {difficulty} deals in the catalog.")
+            return
+        self.choose_deal(number)
+
+    def ask_deal_number(self):
+        from tkinter import simpledialog
+
+        number = simpledialog.askinteger(
+            "Choose Deal", "Deal number:", parent=self.master, minvalue=0
+        )
+        if number is not None:
+            self.choose_deal(number)
 
     def create_deal_button(self):
         self.deal_button = tk.Button(
@@ -378,15 +582,16 @@ class PatienceGame:
         self.deal_button.config(state=tk.NORMAL)
 
     def clear_board(self):
+        self.finish_recording()
         self.interrupt_flag = True
-        self.master.after_cancel(
-            self.master.after_id
-        )  # Cancel any ongoing after() calls
-
-        self.houses = [[] for _ in range(10)]
-        self.end_houses = [[] for _ in range(4)]
-        self.card_items.clear()
-        self.game_canvas.delete("card")
+        if self.animator.running:
+            self.animator.cancel()  # Stops the deal wherever it got to
+            self.audio.stop()
+        self.auto_flight = None
+        self.dealing = False
+
+        self.set_state(engine.EMPTY_STATE)
+        self.renderer.clear()
         self.move_history.clear()
 
         self.move_count = 0
@@ -394,56 +599,81 @@ class PatienceGame:
 
         self.status_var.set("Board cleared. Click 'Deal Cards' to start a new game.")
         self.undo_button.config(state=tk.DISABLED)
+        self.redo_button.config(state=tk.DISABLED)
         if self.initial_deck is None:
             self.redeal_button.config(state=tk.DISABLED)
         else:
             self.redeal_button.config(state=tk.NORMAL)
-        # self.clear_highlights()
+        self.disable_hints()
 
         # Add a small delay before re-enabling the deal button
         self.master.after(500, self.enable_deal_button)
 
     def enable_deal_button(self):
         self.interrupt_flag = False
-        self.deal_button.config(state=tk.NORMAL)
+        if self.card_images:  # Else on_card_images_loaded enables it
+            self.deal_button.config(state=tk.NORMAL)
 
     def animated_deal(self):
         if self.interrupt_flag:
             return  # Don't start a new deal if an interrupt is in progress
+        if not self.card_images:
+            return  # Still loading
 
         self.deal_button.config(state=tk.DISABLED)
         self.status_var.set("Dealing cards...")
 
-        self.houses = [[] for _ in range(10)]
-        self.end_houses = [[] for _ in range(4)]
+        self.finish_recording()
+        self.move_count = 0
+        self.move_counter_label.config(text="Moves: 0")
+        self.disable_hints()
+        self.auto_flight = None
+        self.set_state(engine.EMPTY_STATE)
+        self.move_history.clear()
+        self.redo_button.config(state=tk.DISABLED)
         self.deck = self.create_deck()
 
         self.initial_deck = self.deck.copy()
 
-        house_card_counts = [8, 8, 8, 7, 6, 5, 4, 3, 2, 1]
+        self.deal_deck(self.finish_deal)
 
-        def deal_card(house_index, card_count):
-            if self.interrupt_flag:
-                pygame.mixer.stop()  # Stop the sound if interrupted
-                return
+    def deal_deck(self, on_finish):
+        """Deal self.deck onto the table, animated unless the speed is instant."""
+        duration = DEAL_SPEEDS.get(self.rules_manager.get_deal_speed(), 0.1)
+        self.dealing = True
 
-            if card_count > 0 and self.deck:
-                self.houses[house_index].append(self.deck.pop())
-                self.display_cards()
-                self.master.update()
-                self.play_sound(self.deal_sound)
-                self.master.after_id = self.master.after(
-                    100, deal_card, house_index, card_count - 1
-                )
-            elif house_index < 9:
-                self.master.after_id = self.master.after(
-                    100, deal_card, house_index + 1, house_card_counts[house_index + 1]
-                )
-            else:
-                pygame.mixer.stop()  # Stop the sound when dealing is finished
-                self.finish_deal()
+        def finish():
+            self.dealing = False
+            on_finish()
+
+        if duration == 0:
+            self.set_state(engine.deal(self.deck))
+            self.deck = []
+            self.display_cards()  # A single render pass for all 52 cards
+            self.play_sound("card_deal")
+            finish()
+            return
 
-        deal_card(0, house_card_counts[0])
+        steps = [
+            lambda house_index=house_index: self.deal_next_card(house_index, duration)
+            for house_index, count in enumerate(engine.HOUSE_CARD_COUNTS)
+            for _ in range(count)
+        ]
+        steps.append(finish)
+        self.animator.run(steps)
+
+    def deal_next_card(self, house_index, duration):
+        card = self.deck.pop()
+        self.set_state(engine.add_card(self.state, house_index, card))
+        self.display_cards()  # Only creates the new card's item
+        self.play_sound("card_deal")
+
+        # Fly the card in from the bottom left corner of the table
+        item = self.get_card_item(card)
+        start = self.layout.deal_origin()
+        return Tween(
+            self.game_canvas, item, start, self.game_canvas.coords(item), duration
+        )
 
     def toggle_mute(self):
         self.is_muted = not self.is_muted
@@ -455,18 +685,17 @@ class PatienceGame:
         self.mute_button.config(text="Unmute" if self.is_muted else "Mute")
 
     def apply_mute_state(self):
-        volume = 0.0 if self.is_muted else 1.0
-        self.deal_sound.set_volume(volume)
-        # Apply to other sounds if there are any
+        self.audio.set_muted(self.is_muted)
 
-    def play_sound(self, sound):
-        if not self.is_muted:
-            sound.play()
+    def play_sound(self, name):
+        self.audio.play(name)
 
     def finish_deal(self):
-        self.status_var.set("Cards dealt. Good luck!")
+        self.recorder.start(self.deal_number)
+        self.status_var.set(f"{self.describe_deal(self.deal_number)} dealt. Good luck!")
         self.deal_button.config(state=tk.DISABLED)
-        # self.hint_button.config(state=tk.NORMAL)
+        self.hint_button.config(state=tk.NORMAL)
+        self.on_position_changed()
         self.redeal_button.config(state=tk.NORMAL)
         self.undo_button.config(state=tk.NORMAL)
 
@@ -475,158 +704,106 @@ class PatienceGame:
             self.status_var.set("No previous deal available. Start a new game first.")
             return
 
-        # Reset move count at the beginning of redeal
-        self.move_count = 0
-        self.move_counter_label.config(text="Moves: 0")
-
         self.deal_button.config(state=tk.DISABLED)
         self.status_var.set("Redealing cards...")
 
-        self.houses = [[] for _ in range(10)]
-        self.end_houses = [[] for _ in range(4)]
+        self.finish_recording()
+        self.move_count = 0
+        self.move_counter_label.config(text="Moves: 0")
+        self.disable_hints()
+        self.auto_flight = None
+        self.set_state(engine.EMPTY_STATE)
+        self.move_history.clear()
+        self.redo_button.config(state=tk.DISABLED)
         self.deck = self.initial_deck.copy()
 
-        house_card_counts = [8, 8, 8, 7, 6, 5, 4, 3, 2, 1]
-
-        def redeal_card(house_index, card_count):
-            if self.interrupt_flag:
-                if pygame.mixer.get_busy():
-                    pygame.mixer.stop()  # Stop the sound if interrupted
-                return
-
-            if card_count > 0 and self.deck:
-                self.houses[house_index].append(self.deck.pop())
-                self.display_cards()
-                self.master.update()
-                self.play_sound(self.deal_sound)
-                self.master.after_id = self.master.after(
-                    100, redeal_card, house_index, card_count - 1
-                )
-            elif house_index < 9:
-                self.master.after_id = self.master.after(
-                    100,
-                    redeal_card,
-                    house_index + 1,
-                    house_card_counts[house_index + 1],
-                )
-            else:
-                pygame.mixer.stop()  # Stop the sound when dealing is finished
-                self.finish_redeal()
-
-        redeal_card(0, house_card_counts[0])
+        self.deal_deck(self.finish_redeal)
 
     def handle_escape(self, event):
         if self.master.attributes("-fullscreen"):
             self.toggle_fullscreen()
 
     def finish_redeal(self):
+        self.recorder.start(self.deal_number)
         self.status_var.set("Cards redealt. Good luck!")
         self.deal_button.config(state=tk.DISABLED)
-        # self.hint_button.config(state=tk.NORMAL)
+        self.hint_button.config(state=tk.NORMAL)
+        self.on_position_changed()
         self.redeal_button.config(state=tk.NORMAL)
         self.undo_button.config(state=tk.NORMAL)
 
-        if self.is_muted:
-            pygame.mixer.pause()
-        else:
-            pygame.mixer.unpause()
-
     def display_cards(self):
-        self.game_canvas.delete("card")
-        self.card_items.clear()
-
-        x_spacing = self.card_width + 20
-        y_spacing = int(30 * self.zoom_factor)  # Adjust this value to increase spacing
-        stack_spacing = int(
-            25 * self.zoom_factor
-        )  # New variable for spacing between stacked cards
-
-        for house_idx, house in enumerate(self.houses):
-            x = 60 + house_idx * x_spacing
-            y = 20
-            for card_idx, card in enumerate(house):
-                item = self.game_canvas.create_image(
-                    x, y, image=card.image, anchor=tk.NW, tags="card"
-                )
-                self.card_items[item] = card
-                self.game_canvas.tag_bind(item, "<ButtonPress-1>", self.on_card_press)
-                self.game_canvas.tag_bind(
-                    item, "<ButtonRelease-1>", self.on_card_release
-                )
-                self.game_canvas.tag_bind(item, "<B1-Motion>", self.on_card_motion)
-
-                # Increase the spacing between stacked cards
-                y += stack_spacing
-
-        # Display cards in end houses (if implemented)
-        for house_idx, house in enumerate(self.end_houses):
-            x = 300 + house_idx * x_spacing
-            y = 600
-            for card in house:
-                item = self.game_canvas.create_image(
-                    x, y, image=card.image, anchor=tk.NW, tags="card"
-                )
-                self.card_items[item] = card
-                y += y_spacing
+        with perf.span("display_cards"):
+            # Only items whose position or stacking changed are touched
+            self.renderer.render(self.layout.card_groups(self.state))
 
     def on_card_press(self, event):
-        item = self.game_canvas.find_closest(event.x, event.y)[0]
-        card = self.card_items[item]
-        house_index, house = self.find_card_house(card)
-        if house:
-            card_index = house.index(card)
-            movable_stack = self.get_movable_stack(house, card_index)
+        if self.dealing:
+            return  # Moves before the recorder starts would be lost from the record
+        self.skip_auto_moves()
+        house_index, card_index = self.layout.card_at(self.state, event.x, event.y)
+        if house_index is not None:
+            item = self.get_card_item(self.state.houses[house_index][card_index])
+            movable_stack = self.get_movable_stack(house_index, card_index)
             if movable_stack:
                 self.drag_data = {
-                    "x": event.x,
+                    "x": event.x,  # Pointer position the stack was last drawn at
                     "y": event.y,
+                    "pointer": (event.x, event.y),  # Latest pointer position
                     "item": item,
                     "cards": movable_stack,
-                    "source_house": house,
+                    "source_house": house_index,
                     "source_index": card_index,
-                    "start_positions": [
-                        (self.game_canvas.coords(self.get_card_item(c)))
-                        for c in movable_stack
-                    ],
                 }
+                # The stack shares one tag so it moves with a single call
                 for drag_card in movable_stack:
-                    self.game_canvas.tag_raise(self.get_card_item(drag_card))
+                    self.game_canvas.addtag_withtag(
+                        "drag", self.get_card_item(drag_card)
+                    )
+                self.game_canvas.tag_raise("drag")
             else:
                 self.drag_data = {"x": 0, "y": 0, "item": None}
         else:
             self.drag_data = {"x": 0, "y": 0, "item": None}
 
-    def get_movable_stack(self, house, card_index):
-        if card_index < len(house) - 1:
-            # Check if the cards below follow the rule (descending rank, alternating color)
-            for i in range(card_index + 1, len(house)):
-                if (
-                    house[i].rank != house[i - 1].rank - 1
-                    or house[i].color == house[i - 1].color
-                ):
-                    return None  # Can't move this card as it's not at the bottom of a valid stack
-
-        # If we reach here, we can move the card and any valid cards above it
-        movable_stack = house[card_index:]
-        return movable_stack if len(movable_stack) > 0 else None
+    def get_movable_stack(self, house_index, card_index):
+        # The card must sit at the bottom of a valid run (descending rank, alternating color)
+        if not self.move_index.is_movable(house_index, card_index):
+            return None
+        return self.state.houses[house_index][card_index:]
 
     def update_game_state(self, dragged_item):
-        self.save_move()
-
-        dragged_cards = self.drag_data["cards"]
         x, y = self.game_canvas.coords(dragged_item)
+        # The dragged items are no longer where the renderer left them
+        self.renderer.invalidate(self.drag_data["cards"])
 
         source_house = self.drag_data["source_house"]
-        target_house, target_house_index = self.find_nearest_house(x, y)
+        target = self.layout.drop_target(
+            self.state, x + self.card_width // 2, y + self.card_height // 2
+        )
 
-        if source_house != target_house and self.is_valid_move(
-            dragged_cards, target_house
-        ):
-            self.move_card(dragged_cards, source_house, target_house)
+        move = engine.make_move(
+            self.state, source_house, self.drag_data["source_index"], target
+        )
+        if self.is_valid_move(move):
+            self.move_history.record(move)
+            self.recorder.move(move)
+            self.redo_button.config(state=tk.DISABLED)
+            self.move_card(move)
             self.update_move_count()
+            flights = self.apply_auto_moves()
+            self.on_position_changed()
+        else:
+            flights = []
 
         self.display_cards()
 
+        if flights:
+            self.animate_auto_moves(flights, self.check_game_end)
+        else:
+            self.check_game_end()
+
+    def check_game_end(self):
         if self.check_win():
             self.status_var.set("Congratulations! You've won the game!")
             self.deal_button.config(state=tk.NORMAL)
@@ -634,260 +811,300 @@ class PatienceGame:
             self.status_var.set("Game over. No more moves possible. Try again!")
             self.deal_button.config(state=tk.NORMAL)
 
-    def find_nearest_house(self, x, y):
-        min_distance = float("inf")
-        nearest_house = None
-        nearest_index = -1
+    def apply_auto_moves(self):
+        """Make the moves that follow from the player's, as one state update.
+
+        A forced win is played out to the end; otherwise, if auto-play is on,
+        every safe move to the end houses is made. Returns (card, (x, y)) for
+        each card moved, in order, with where it was on the canvas.
+        """
+        if self.move_index.is_won():
+            return []
+        if self.move_index.is_forced_win():
+            moves = engine.finishing_moves(self.state)
+            self.status_var.set("Every card can be played off now. Finishing...")
+        elif self.rules_manager.get_auto_play():
+            moves = engine.safe_moves(self.state)
+        else:
+            return []
+
+        state = self.state
+        flights = []
+        for move in moves:
+            card = state.houses[move.source][-1]
+            flights.append(
+                (card, tuple(self.game_canvas.coords(self.get_card_item(card))))
+            )
+            self.move_history.record(move)
+            self.recorder.move(move)
+            state = engine.apply_move(state, move)
+        self.set_state(state)
+        self.move_count += len(moves)
+        self.move_counter_label.config(text=f"Moves: {self.move_count}")
+        return flights
 
-        for i, house in enumerate(self.houses):
-            house_x = 60 + i * (self.card_width + 20)
-            house_y = 20
-            distance = ((x - house_x) ** 2 + (y - house_y) ** 2) ** 0.5
+    def animate_auto_moves(self, flights, on_finish):
+        """Fly cards already rendered at their end houses there one by one."""
+        duration = DEAL_SPEEDS.get(self.rules_manager.get_deal_speed(), 0.1)
+        if duration == 0:
+            on_finish()
+            return
 
-            if distance < min_distance:
-                min_distance = distance
-                nearest_house = house
-                nearest_index = i
+        # Put the cards back where they were, stacked as they were
+        for card, start in reversed(flights):
+            item = self.get_card_item(card)
+            self.game_canvas.coords(item, *start)
+            self.game_canvas.tag_raise(item)
+
+        def fly(card, start):
+            item = self.get_card_item(card)
+            self.game_canvas.tag_raise(item)
+            self.play_sound("card_deal")
+            return Tween(
+                self.game_canvas, item, start, self.renderer.positions[card], duration
+            )
 
-        return nearest_house, nearest_index
+        def land():
+            self.auto_flight = None
+            on_finish()
+
+        self.auto_flight = ([card for card, start in flights], on_finish)
+        steps = [
+            lambda card=card, start=start: fly(card, start) for card, start in flights
+        ]
+        steps.append(land)
+        self.animator.run(steps)
+
+    def skip_auto_moves(self):
+        """Land any cards still flying at once, e.g. when the player acts."""
+        if self.auto_flight is None:
+            return
+        cards, on_finish = self.auto_flight
+        self.auto_flight = None
+        self.animator.cancel()
+        self.renderer.invalidate(cards)
+        self.display_cards()
+        on_finish()
 
     def on_card_release(self, event):
         if self.drag_data["item"] and self.drag_data["cards"]:
+            self.drag_data["pointer"] = (event.x, event.y)
+            self.flush_drag()
+            self.game_canvas.dtag("drag", "drag")
             self.update_game_state(self.drag_data["item"])
             self.undo_button.config(state=tk.NORMAL)
-            if self.check_win():
-                self.status_var.set("Congratulations! You've won the game!")
         self.drag_data = {
             "x": 0,
             "y": 0,
             "item": None,
             "cards": None,
-            "start_positions": None,
         }
 
     def on_card_motion(self, event):
         if self.drag_data["item"] and self.drag_data["cards"]:
-            dx = event.x - self.drag_data["x"]
-            dy = event.y - self.drag_data["y"]
-            for i, card in enumerate(self.drag_data["cards"]):
-                item = self.get_card_item(card)
-                start_x, start_y = self.drag_data["start_positions"][i]
-                self.game_canvas.moveto(item, start_x + dx, start_y + dy)
-            self.game_canvas.update_idletasks()  # Force immediate update
-
-    def is_valid_move(self, cards, target_house):
-        if not isinstance(cards, list):
-            cards = [cards]  # Convert single card to a list
-
-        if not target_house:  # If the target house is empty
-            return True  # Any card can be placed on an empty house
-
-        target_card = target_house[-1]
-        moving_card = cards[0]  # The bottom card of the moving stack
-
-        # Check if the bottom card of the moving stack can be placed on the target card
-        if (moving_card.rank == target_card.rank - 1) and (
-            moving_card.color != target_card.color
-        ):
-            # If it's a valid move, check if all cards in the stack maintain the alternating color and descending rank
-            for i in range(1, len(cards)):
-                if not (
-                    cards[i].rank == cards[i - 1].rank - 1
-                    and cards[i].color != cards[i - 1].color
-                ):
-                    return False
-            return True
-        return False
-
-    def find_card_house(self, card):
-        for i, house in enumerate(self.houses):
-            if card in house:
-                return i, house
-        return None, None
-
-    def save_move(self):
-        if len(self.move_history) >= 5:
-            self.move_history.pop(0)
-        self.move_history.append([house.copy() for house in self.houses])
-
-    def move_card(self, cards, from_house, to_house):
-        if not isinstance(cards, list):
-            cards = [cards]  # Convert single card to a list
-
-        # Find the index of the first card in the source house
-        index = from_house.index(cards[0])
-
-        # Remove these cards from the source house
-        from_house[index:] = []
+            # Only remember the pointer; the stack is moved once per frame
+            self.drag_data["pointer"] = (event.x, event.y)
+            if self.drag_after_id is None:
+                self.drag_after_id = self.master.after(DRAG_FRAME_MS, self.flush_drag)
+
+    def flush_drag(self):
+        if self.drag_after_id is not None:
+            self.master.after_cancel(self.drag_after_id)
+            self.drag_after_id = None
+        if not self.drag_data["item"]:
+            return
+        x, y = self.drag_data["pointer"]
+        dx = x - self.drag_data["x"]
+        dy = y - self.drag_data["y"]
+        if dx or dy:
+            with perf.span("drag"):
+                self.game_canvas.move("drag", dx, dy)
+            self.drag_data["x"], self.drag_data["y"] = x, y
 
-        # Add the cards to the target house
-        to_house.extend(cards)
+    def is_valid_move(self, move):
+        return self.move_index.is_legal(move)
 
-        # Update the cards_above attribute for the cards
-        for i in range(len(cards) - 1):
-            cards[i].cards_above = [cards[i + 1]]
-        cards[-1].cards_above = []
+    def set_state(self, state):
+        self.state = state
+        self.move_index.update(state)
 
-        # If the target house is not empty, update the cards_above of the previous top card
-        if len(to_house) > len(cards):
-            to_house[-len(cards) - 1].cards_above = [cards[0]]
+    def move_card(self, move):
+        self.set_state(engine.apply_move(self.state, move))
 
     def check_win(self):
-        valid_house_count = 0
-
-        for house in self.houses:
-            if len(house) == 13:
-                if house[0].rank == 13 and house[-1].rank == 1:
-                    if all(
-                        house[i].rank == house[i - 1].rank - 1 for i in range(1, 13)
-                    ):
-                        valid_house_count += 1
-
-        if valid_house_count == 4:
+        if self.move_index.is_won():
             self.win_celebration.show_celebration(self.move_count)
             return True
 
         return False
 
     def get_card_item(self, card):
-        for item, c in self.card_items.items():
-            if c == card:
-                return item
-        return None
+        return self.renderer.items.get(card)
 
     def is_game_over(self):
-        # Check if any moves are possible
-        for i, source_house in enumerate(self.houses):
-            if not source_house:
-                continue
-            for j, target_house in enumerate(self.houses):
-                if i != j and self.is_valid_move([source_house[-1]], target_house):
-                    return False
-        # Check if any cards can be moved to end houses
-        for house in self.houses:
-            if house and self.can_move_to_end_house(house[-1]):
-                return False
-        return True
-
-    def can_move_to_end_house(self, card):
-        for end_house in self.end_houses:
-            if not end_house and card.rank == 1:  # Ace can be moved to empty end house
-                return True
-            if (
-                end_house
-                and card.suit == end_house[-1].suit
-                and card.rank == end_house[-1].rank + 1
-            ):
-                return True
-        return False
+        return not self.move_index.has_legal_move()
+
+    def on_position_changed(self):
+        """After every deal, move, undo and redo: old hints no longer apply."""
+        self.clear_highlights()
+        if self.hint_engine.prefetch(self.state):
+            self.status_var.set("Hint cancelled: the cards have moved.")
+        self.check_winnability()
+
+    def disable_hints(self):
+        self.clear_highlights()
+        self.hint_engine.cancel()
+        self.hint_button.config(state=tk.DISABLED)
+        self.lost_at = None
+        self.winnable_label.config(text="")
+
+    def on_hint_result(self, state, hint):
+        if perf.enabled:
+            now = time.perf_counter()
+            perf.add_span("solver", now - hint.elapsed, now)
+        if state == self.state and self.hint_button.instate(["!disabled"]):
+            self.show_winnability(hint.solvable)
+
+    def check_winnability(self):
+        """Report at once when the position is settled, else once it is searched.
+
+        The search is the one the hint engine starts after every move, and its
+        cache makes undo, redo and transposed positions answer instantly. A
+        position it could not decide is searched again, for longer, until the
+        engine's retry budget runs out.
+        """
+        if self.move_index.is_won():
+            self.winnable_label.config(text="Won")
+        elif not self.move_index.has_legal_move():
+            self.show_winnability(False)
+        else:
+            known = self.hint_engine.known_solvability(self.state)
+            if known is not None:
+                self.show_winnability(known)
+            elif self.hint_engine.budget_for(self.state) is None:
+                self.show_winnability(None)  # No further search will run
+            else:
+                self.winnable_label.config(text="Checking...")
+
+    def show_winnability(self, solvable):
+        if solvable:
+            self.lost_at = None
+            self.winnable_label.config(text="Still winnable")
+        elif solvable is False:
+            if self.lost_at is None or self.lost_at[0] > len(self.move_history):
+                self.lost_at = self.find_loss()
+                self.status_var.set(
+                    f"Warning: The game can no longer be won ({self.loss_text()})."
+                )
+            self.winnable_label.config(text=self.loss_text().capitalize())
+        else:
+            self.winnable_label.config(text="Winnable: unsure")
+
+    def find_loss(self):
+        """(move, exact) for the move that lost the game, walking back the history.
+
+        Only positions the hint engine has already settled are known; going
+        back stops at the first unsearched one, so the loss is then only known
+        to have happened by that move.
+        """
+        state = self.state
+        done = self.move_history.done
+        for count in range(len(done), 0, -1):
+            state = engine.unapply_move(state, done[count - 1])
+            known = self.hint_engine.known_solvability(state)
+            if known is not False:
+                return count, bool(known)
+        return 0, True
+
+    def loss_text(self):
+        count, exact = self.lost_at
+        if count == 0:
+            return "not winnable from the deal"
+        return f"lost {'at' if exact else 'by'} move {count}"
+
+    def show_hint(self):
+        self.clear_highlights()
+        self.status_var.set("Looking for a hint...")
+        # Usually answered at once from the search started after the last move
+        self.hint_engine.hint(self.state, self.show_hint_result)
+
+    def show_hint_result(self, hint):
+        if hint.move is None:
+            if hint.solvable is False:
+                self.status_var.set(
+                    "No hints available. This game can no longer be won."
+                )
+            else:
+                self.status_var.set(
+                    "No hints available. The game may be in an unwinnable state."
+                )
+            return
 
-    # def create_hint_button(self):
-    #     self.hint_button = tk.Button(self.master, text="Hint", command=self.show_hint)
-    #     self.hint_button.pack(side=tk.BOTTOM, pady=10)
-
-    # FIXME: Better hints.
-
-    # def check_game_winnable(self):
-    #     current_state = GameState(
-    #         [[Card(card.suit, card.rank) for card in house] for house in self.houses]
-    #     )
-    #     solver = Solver(current_state)
-    #     if not solver.is_game_winnable():
-    #         self.status_var.set("Warning: The game may no longer be winnable.")
-
-    # def get_hint(self):
-    #     current_state = GameState(
-    #         [[Card(card.suit, card.rank) for card in house] for house in self.houses]
-    #     )
-    #     solver = Solver(current_state)
-    #     best_move = solver.find_best_move()
-    #     return best_move
-
-    # def is_game_winnable(self):
-    #     current_state = GameState(
-    #         [[Card(card.suit, card.rank) for card in house] for house in self.houses]
-    #     )
-    #     solver = Solver(current_state)
-    #     return solver.is_game_winnable()
-
-    # def show_hint(self):
-    #     self.clear_highlights()
-    #     best_move = self.get_hint()
-
-    #     if best_move:
-    #         source, target, card = best_move
-    #         source_house = self.houses[source]
-    #         target_house = self.houses[target]  # Not used.
-
-    #         # Highlight the card to move
-    #         self.highlight_card(source_house[-1])
-
-    #         # Update status bar with hint message
-    #         self.status_var.set(
-    #             f"Hint: Move {card.rank} of {card.suit} from house {source + 1} to house {target + 1}"
-    #         )
-    #     else:
-    #         self.status_var.set(
-    #             "No hints available. The game may be in an unwinnable state."
-    #         )
-
-    #     # Check if the game is still winnable
-    #     if not self.is_game_winnable():
-    #         self.status_var.set("Warning: The game may no longer be winnable.")
+        source, index, target, count = hint.move
+        card = self.state.houses[source][index]
+        self.highlight_card(card)
+        if target >= engine.FOUNDATION:
+            destination = f"the {engine.card_suit(card)} end house"
+        else:
+            destination = f"house {target + 1}"
+        message = f"Hint: Move the {engine.card_name(card)} to {destination}."
+        if hint.solvable is None:
+            message += " (No sure win found yet.)"
+        self.status_var.set(message)
 
     # FIXME: Make better card highlighting. Try highlighting the card entirely instead of just the border.
 
-    # def highlight_card(self, card):
-    #     self.clear_highlights()  # Clear existing highlights
-    #     item = self.get_card_item(card)
-    #     x, y = self.game_canvas.coords(item)
-
-    #     # Create a semi-transparent rectangle over the entire card
-    #     highlight = self.game_canvas.create_rectangle(
-    #         x,
-    #         y,
-    #         x + self.card_width,
-    #         y + self.card_height,
-    #         fill="yellow",
-    #         stipple="gray50",
-    #         outline="",
-    #         tags="highlight",
-    #     )
-
-    #     self.highlight_rectangles.append(highlight)
-    #     self.game_canvas.tag_raise(highlight)
-    #     self.game_canvas.tag_raise(item)
-
-    #     # Start the strobing effect
-    #     self.strobe_highlight(highlight, 5)  # 5 seconds of strobing
-
-    # def strobe_highlight(self, highlight, duration):
-    #     start_time = time.time()
-
-    #     def update_opacity():
-    #         elapsed = time.time() - start_time
-    #         if elapsed < duration:
-    #             # Calculate opacity using a sine wave for smooth pulsing
-    #             opacity = int(sin(elapsed * pi) * 63 + 64)  # Reduced opacity range
-    #             color = f"#{opacity:02x}ffff"  # Yellow with varying opacity
-    #             self.game_canvas.itemconfig(highlight, fill=color)
-    #             self.strobe_after_id = self.master.after(
-    #                 50, update_opacity
-    #             )  # Update every 50ms
-    #         else:
-    #             self.game_canvas.delete(highlight)
-    #             self.highlight_rectangles.remove(highlight)
-    #             self.strobe_after_id = None
-
-    #     update_opacity()
-
-    # def clear_highlights(self):
-    #     for rect in self.highlight_rectangles:
-    #         self.game_canvas.delete(rect)
-    #     self.highlight_rectangles.clear()
-    #     if self.strobe_after_id is not None:
-    #         self.master.after_cancel(self.strobe_after_id)
-    #         self.strobe_after_id = None
+    def highlight_card(self, card):
+        self.clear_highlights()  # Clear existing highlights
+        item = self.get_card_item(card)
+        x, y = self.game_canvas.coords(item)
+
+        # Create a semi-transparent rectangle over the entire card
+        highlight = self.game_canvas.create_rectangle(
+            x,
+            y,
+            x + self.card_width,
+            y + self.card_height,
+            fill="yellow",
+            stipple="gray50",
+            outline="",
+            tags="highlight",
+        )
+
+        self.highlight_rectangles.append(highlight)
+        # Stippled, so the card shows through from underneath
+        self.game_canvas.tag_raise(highlight)
+
+        # Start the strobing effect
+        self.strobe_highlight(highlight, 5)  # 5 seconds of strobing
+
+    def strobe_highlight(self, highlight, duration):
+        start_time = time.time()
+
+        def update_opacity():
+            elapsed = time.time() - start_time
+            if elapsed < duration:
+                # Calculate opacity using a sine wave for smooth pulsing
+                opacity = int(sin(elapsed * pi) * 63 + 64)  # Reduced opacity range
+                color = f"#ffff{opacity:02x}"  # Yellow with varying saturation
+                self.game_canvas.itemconfig(highlight, fill=color)
+                self.strobe_after_id = self.master.after(
+                    50, update_opacity
+                )  # Update every 50ms
+            else:
+                self.game_canvas.delete(highlight)
+                self.highlight_rectangles.remove(highlight)
+                self.strobe_after_id = None
+
+        update_opacity()
+
+    def clear_highlights(self):
+        for rect in self.highlight_rectangles:
+            self.game_canvas.delete(rect)
+        self.highlight_rectangles.clear()
+        if self.strobe_after_id is not None:
+            self.master.after_cancel(self.strobe_after_id)
+            self.strobe_after_id = None
 
     def toggle_fullscreen(self):
         is_fullscreen = self.master.attributes("-fullscreen")
@@ -905,12 +1122,18 @@ class PatienceGame:
             self.status_var.set("Fullscreen mode disabled.")
 
     def undo_move(self):
-        if not self.move_history:
+        if self.dealing:
+            return
+        self.skip_auto_moves()
+        if not self.move_history.can_undo():
             self.show_undo_alert()
             return
 
-        self.houses = self.move_history.pop()
+        move = self.move_history.undo()
+        self.recorder.undo()
+        self.set_state(engine.unapply_move(self.state, move))
         self.display_cards()
+        self.on_position_changed()
         self.status_var.set("Move undone.")
 
         self.move_count = max(
@@ -918,18 +1141,54 @@ class PatienceGame:
         )  # Ensure move count doesn't go below 0
         self.move_counter_label.config(text=f"Moves: {self.move_count}")
 
-        if not self.move_history:
+        if not self.move_history.can_undo():
             self.undo_button.config(state=tk.DISABLED)
+        self.redo_button.config(state=tk.NORMAL)
+
+    def redo_move(self):
+        self.skip_auto_moves()
+        if not self.move_history.can_redo():
+            return
+
+        move = self.move_history.redo()
+        self.recorder.redo()
+        self.move_card(move)
+        self.display_cards()
+        self.on_position_changed()
+        self.status_var.set("Move redone.")
+        self.update_move_count()
+
+        self.undo_button.config(state=tk.NORMAL)
+        if not self.move_history.can_redo():
+            self.redo_button.config(state=tk.DISABLED)
+
+    def toggle_trace_recording(self):
+        if perf.recording:
+            path = perf.stop_recording()
+            if path:
+                self.status_var.set(f"Performance trace saved to {path}")
+        else:
+            perf.start_recording()
+            self.status_var.set(
+                "Recording a performance trace. Press Ctrl+F12 to save it."
+            )
+        self.perf_hud.update_heartbeat()
+
+    def finish_recording(self):
+        """Save the game being played, if any, with how it ended."""
+        if self.move_index.is_won():
+            result = "won"
+        elif not self.move_index.has_legal_move():
+            result = "lost"
+        else:
+            result = "abandoned"
+        self.recorder.finish(self.state, result)
 
     def show_undo_alert(self):
-        tk.messagebox.showwarning(
-            "Undo Limit Reached", "You can only undo up to 5 moves."
-        )
+        tk.messagebox.showwarning("Nothing to Undo", "There are no moves to undo.")
 
     # TODO: Add timer.
 
-    # TODO: Add gamestate check to make sure game is winnable after each move, and warn player if not. (Minimax maybe? A-B Pruning)
-
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,243 @@
+"""Hints computed in a worker process, so the UI never waits on the solver.
+
+HintEngine starts one worker the first time it is needed. Each search is a
+job tagged with an id; starting a new one bumps a shared generation counter,
+and the worker's solver polls it and gives up as soon as its job is stale.
+Results come back through a queue that the Tk thread polls with after().
+Positions are searched speculatively a moment after every move, so asking
+for a hint is usually answered straight from the finished search.
+
+Every settled answer is cached: hints by exact position, and whether a
+position can still be won by its canonical key, so undo, redo and positions
+reached by another move order cost nothing. A winning line also settles
+every position along it. A search that ran out of time is kept with its
+budget; coming back to that position searches it again with twice the
+budget, up to MAX_RETRY_BUDGET, so a hard position is eventually settled.
+"""
+
+from collections import namedtuple
+import multiprocessing
+import queue
+
+import engine
+from solver import Solver, canonical_key, ordered_moves
+
+DEFAULT_TIME_BUDGET = 2.0
+POLL_MS = 50
+# Wait this long after a move before searching, so quick moves don't thrash
+PREFETCH_DELAY_MS = 250
+# Caches are dropped wholesale once they hold this many positions
+CACHE_LIMIT = 50000
+# Searches of a position that keeps running out of time stop growing here
+MAX_RETRY_BUDGET = 20.0
+
+# `move` is the suggested Move or None; `solvable` is as in SolveResult, so
+# None means the budget ran out and `move` is only the likeliest candidate.
+# `line` is the winning sequence starting with `move` when one was found.
+Hint = namedtuple("Hint", ["move", "solvable", "nodes", "elapsed", "line"])
+
+
+def find_hint(state, time_budget, cancelled=None):
+    result = Solver(node_limit=None, time_limit=time_budget, cancelled=cancelled).solve(
+        state
+    )
+    line = ()
+    if result.solvable:
+        line = tuple(result.moves)
+        move = line[0] if line else None
+    elif result.solvable is None:
+        # No line to a win found in time; fall back to the search's favourite
+        moves = ordered_moves(state)
+        move = moves[0] if moves else None
+    else:
+        move = None
+    return Hint(move, result.solvable, result.nodes, result.elapsed, line)
+
+
+def worker_main(requests, results, generation):
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        job_id, state, time_budget = job
+        if generation.value != job_id:
+            continue  # Superseded while it was queued
+
+        def cancelled():
+            return generation.value != job_id
+
+        hint = find_hint(state, time_budget, cancelled)
+        if not cancelled():
+            results.put((job_id, hint))
+
+
+class HintEngine:
+    def __init__(self, master, time_budget=DEFAULT_TIME_BUDGET, on_result=None):
+        self.master = master
+        self.time_budget = time_budget
+        self.on_result = on_result  # Called with (position, Hint) as each arrives
+        self.process = None
+        self.requests = None
+        self.results = None
+        self.generation = None
+        self.job_id = 0
+        self.job_state = None  # Position being searched
+        self.job_budget = None  # Time budget it is searched with
+        self.hints = {}  # Position -> settled Hint
+        self.undecided = {}  # Position -> (time budget, Hint) that ran out of time
+        self.solvability = {}  # Canonical key -> True or False
+        self.waiting = None  # (position, callback) the player is waiting on
+        self.poll_after_id = None
+        self.prefetch_after_id = None
+
+    def start_worker(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        # Forking a process that has Tk running is unsafe on macOS
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.generation = context.Value("i", 0, lock=False)
+        self.process = context.Process(
+            target=worker_main,
+            args=(self.requests, self.results, self.generation),
+            daemon=True,
+        )
+        self.process.start()
+
+    def budget_for(self, state):
+        """Time budget to search `state` with, or None if it is no use."""
+        if state in self.hints:
+            return None
+        tried = self.undecided.get(state)
+        if tried is None:
+            return self.time_budget
+        budget = max(self.time_budget, min(2 * tried[0], MAX_RETRY_BUDGET))
+        return budget if budget > tried[0] else None
+
+    def search(self, state):
+        """Start searching `state` unless it is known or already searched as long."""
+        budget = self.budget_for(state)
+        if budget is None or (state == self.job_state and budget <= self.job_budget):
+            return
+        self.start_worker()
+        self.job_id += 1
+        self.generation.value = self.job_id
+        self.job_state = state
+        self.job_budget = budget
+        self.requests.put((self.job_id, state, budget))
+        self.schedule_poll()
+
+    def cancel(self):
+        """Drop the current position: stop its search and any pending request.
+
+        Returns True if a hint the player asked for was dropped unanswered.
+        """
+        if self.prefetch_after_id is not None:
+            self.master.after_cancel(self.prefetch_after_id)
+            self.prefetch_after_id = None
+        if self.generation is not None:
+            self.generation.value = 0  # Matches no job
+        self.job_state = None
+        dropped = self.waiting is not None
+        self.waiting = None
+        return dropped
+
+    def prefetch(self, state):
+        """The position changed; search it once the player pauses.
+
+        Returns True if a hint the player asked for was dropped unanswered.
+        """
+        dropped = self.cancel()
+
+        def start():
+            self.prefetch_after_id = None
+            self.search(state)
+
+        self.prefetch_after_id = self.master.after(PREFETCH_DELAY_MS, start)
+        return dropped
+
+    def hint(self, state, callback):
+        """Call `callback(hint)` for `state`, at once if it is already known."""
+        if self.budget_for(state) is None:
+            hint = self.hints.get(state) or self.undecided[state][1]
+            callback(hint)
+            return
+        if self.prefetch_after_id is not None:
+            self.master.after_cancel(self.prefetch_after_id)
+            self.prefetch_after_id = None
+        self.waiting = (state, callback)
+        self.search(state)
+
+    def schedule_poll(self):
+        if self.poll_after_id is None:
+            self.poll_after_id = self.master.after(POLL_MS, self.poll_results)
+
+    def poll_results(self):
+        self.poll_after_id = None
+        while True:
+            try:
+                job_id, hint = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job_id == self.job_id and self.job_state is not None:
+                self.deliver(self.job_state, hint, self.job_budget)
+
+        if self.job_state is None:
+            return
+        if self.process.is_alive():
+            self.schedule_poll()
+        else:
+            # The worker died; answer with no hint rather than leave the player waiting
+            self.process = None
+            self.deliver(self.job_state, Hint(None, None, 0, 0.0, ()))
+
+    def known_solvability(self, state):
+        """True or False if `state` has been settled, else None."""
+        return self.solvability.get(canonical_key(state))
+
+    def learn(self, state, hint, budget):
+        if len(self.hints) > CACHE_LIMIT:
+            self.hints.clear()
+        if len(self.undecided) > CACHE_LIMIT:
+            self.undecided.clear()
+        if len(self.solvability) > CACHE_LIMIT:
+            self.solvability.clear()
+        if hint.solvable is None:
+            self.undecided[state] = (budget, hint)
+            return
+        self.undecided.pop(state, None)
+        self.hints[state] = hint
+        self.solvability[canonical_key(state)] = hint.solvable
+        # Each position along a winning line is winnable, and its hint is the
+        # rest of the line
+        line = hint.line
+        for i in range(1, len(line)):
+            state = engine.apply_move(state, line[i - 1])
+            self.hints.setdefault(state, Hint(line[i], True, 0, 0.0, line[i:]))
+            self.undecided.pop(state, None)
+            self.solvability[canonical_key(state)] = True
+
+    def deliver(self, state, hint, budget=None):
+        """Pass on `hint`, caching it unless `budget` is None as no search ran."""
+        self.job_state = None
+        if budget is not None:
+            self.learn(state, hint, budget)
+        if self.on_result is not None:
+            self.on_result(state, hint)
+        if self.waiting is not None and self.waiting[0] == state:
+            callback = self.waiting[1]
+            self.waiting = None
+            callback(hint)
+
+    def close(self):
+        self.cancel()
+        if self.poll_after_id is not None:
+            self.master.after_cancel(self.poll_after_id)
+            self.poll_after_id = None
+        if self.process is not None and self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=0.2)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.process = None
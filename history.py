@@ -0,0 +1,40 @@
+from collections import deque
+
+
+class MoveHistory:
+    """Unlimited undo/redo as a log of engine Moves.
+
+    Each entry is just (source, index, target, count), so memory per move is
+    constant and undoing or redoing touches only the cards that moved.
+    """
+
+    def __init__(self):
+        self.done = deque()
+        self.undone = deque()
+
+    def record(self, move):
+        self.done.append(move)
+        self.undone.clear()  # A new move discards the redo branch
+
+    def undo(self):
+        move = self.done.pop()
+        self.undone.append(move)
+        return move
+
+    def redo(self):
+        move = self.undone.pop()
+        self.done.append(move)
+        return move
+
+    def can_undo(self):
+        return bool(self.done)
+
+    def can_redo(self):
+        return bool(self.undone)
+
+    def clear(self):
+        self.done.clear()
+        self.undone.clear()
+
+    def __len__(self):
+        return len(self.done)
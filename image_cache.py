@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import queue
+
+from atlas import ZOOM_LEVELS, card_size
+
+# Room for roughly a dozen zoom levels of 52 cards at the default size
+DEFAULT_MAX_BYTES = 48 * 1024 * 1024
+# Decoded PNGs are kept no bigger than the largest zoom level needs
+SOURCE_SIZE = card_size(ZOOM_LEVELS[-1])
+# Pillow releases the GIL while decoding and resizing, so faces are prepared
+# on this many threads at once
+WORKERS = min(8, os.cpu_count() or 1)
+# How often the Tk thread picks up faces prepared in the background
+POLL_MS = 10
+
+
+class CardImageCache:
+    """Card faces decoded once, with PhotoImages kept per rendered size.
+
+    Sizes packed in the card atlas are sliced straight out of it. Any other
+    size is resized from the PNGs, each read a single time and shrunk to
+    SOURCE_SIZE. PhotoImages for each (width, height) are kept in LRU order
+    and whole sizes are evicted once their estimated footprint exceeds
+    `max_bytes`. The size in use is always the most recent one, so it is
+    never evicted.
+
+    Faces are decoded and resized on a thread pool. Only the PhotoImages,
+    which belong to Tk, are made on the calling thread.
+    """
+
+    def __init__(self, image_path, cards, max_bytes=DEFAULT_MAX_BYTES, atlas=None):
+        self.image_path = image_path
+        self.cards = list(cards)
+        self.max_bytes = max_bytes
+        self.atlas = atlas
+        self.sources = {}
+        self.sizes = OrderedDict()  # (width, height) -> {card: PhotoImage}
+        self.executor = None
+
+    def pool(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="card-images"
+            )
+        return self.executor
+
+    def source(self, card):
+        """Largest face of `card`, read once. Called on the worker threads."""
+        from PIL import Image
+
+        image = self.sources.get(card)
+        if image is None:
+            image = Image.open(self.image_path(card))
+            image.load()
+            if image.width > SOURCE_SIZE[0] or image.height > SOURCE_SIZE[1]:
+                # The full 500x726 faces would take ~72 MB outside max_bytes
+                image = image.resize(SOURCE_SIZE, Image.LANCZOS)
+            self.sources[card] = image
+        return image
+
+    def face(self, card, size):
+        """PIL image of `card` at `size`. Called on the worker threads."""
+        from PIL import Image
+
+        if self.atlas is not None and self.atlas.has_size(*size):
+            return self.atlas.card_image(card, *size)
+        source = self.source(card)
+        if source.size == size:
+            return source
+        return source.resize(size, Image.LANCZOS)
+
+    def cached(self, size):
+        images = self.sizes.get(size)
+        if images is not None:
+            self.sizes.move_to_end(size)
+        return images
+
+    def store(self, size, images):
+        self.sizes[size] = images
+        self.evict()
+        return images
+
+    def get_images(self, width, height):
+        from PIL import ImageTk
+
+        size = (width, height)
+        images = self.cached(size)
+        if images is not None:
+            return images
+
+        if self.atlas is not None and self.atlas.has_size(width, height):
+            # Slicing the mapped atlas is cheaper than handing work to threads
+            faces = [self.face(card, size) for card in self.cards]
+        else:
+            faces = self.pool().map(lambda card: self.face(card, size), self.cards)
+        return self.store(
+            size,
+            {card: ImageTk.PhotoImage(face) for card, face in zip(self.cards, faces)},
+        )
+
+    def load_in_background(
+        self, width, height, master, on_ready, on_progress=None, on_error=None
+    ):
+        """Like get_images, but returns at once and calls `on_ready(images)` later.
+
+        Faces are prepared on the pool while the Tk event loop keeps running.
+        PhotoImages are made as the faces come in, with `on_progress(done,
+        total)` after each batch. A face that failed on the pool is tried once
+        more on the calling thread; if that fails too, loading stops and
+        `on_error(exception)` is called instead of `on_ready`.
+        """
+        from PIL import ImageTk
+
+        size = (width, height)
+        images = self.cached(size)
+        if images is not None:
+            on_ready(images)
+            return
+
+        prepared = queue.Queue()
+        for card in self.cards:
+            future = self.pool().submit(self.face, card, size)
+            future.add_done_callback(
+                lambda future, card=card: prepared.put((card, future))
+            )
+        images = {}
+
+        def poll():
+            before = len(images)
+            while True:
+                try:
+                    card, future = prepared.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    face = future.result()
+                except Exception:
+                    try:
+                        face = self.face(card, size)
+                    except Exception as error:
+                        if on_error is not None:
+                            on_error(error)
+                        return
+                images[card] = ImageTk.PhotoImage(face)
+            if len(images) < len(self.cards):
+                if on_progress is not None and len(images) > before:
+                    on_progress(len(images), len(self.cards))
+                master.after(POLL_MS, poll)
+                return
+            # Once a zoom has loaded a size of its own, that one stays the most
+            # recent so it is never evicted
+            if not self.sizes:
+                self.store(size, images)
+            on_ready(self.sizes.get(size, images))
+
+        master.after(POLL_MS, poll)
+
+    @staticmethod
+    def size_bytes(size):
+        width, height = size
+        return width * height * 4
+
+    def cached_bytes(self):
+        return sum(
+            self.size_bytes(size) * len(images) for size, images in self.sizes.items()
+        )
+
+    def evict(self):
+        while len(self.sizes) > 1 and self.cached_bytes() > self.max_bytes:
+            self.sizes.popitem(last=False)
+
+    def clear(self):
+        self.sizes.clear()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,186 @@
+"""Where things are on the table, and what is under a point.
+
+Houses are columns of overlapping cards along the top, end houses a row of
+piles below them. A Layout works out every slot and card position once for
+a card size and canvas height; rendering, hit-testing and animation then
+only look positions up, and a new Layout is made only when the zoom or the
+canvas size changes.
+
+Hit-testing is arithmetic on that geometry, so finding the card under the
+pointer or the pile a stack is dropped on takes the same few integer
+operations however long the columns are, and never asks the canvas.
+"""
+
+import engine
+
+HOUSE_LEFT = 60
+HOUSE_TOP = 20
+HOUSE_GAP = 20  # Between neighbouring columns, and kept clear below them
+STACK_SPACING = 25  # Between overlapping cards in a house, at zoom 1
+# Long columns squeeze their cards together down to this, so they fit
+MIN_STACK_SPACING = 8
+END_HOUSE_LEFT = 300
+END_HOUSE_TOP = 600  # Raised when the canvas is too short to show the row
+END_HOUSE_SPACING = 30  # Between overlapping cards on an end house, at zoom 1
+DEAL_MARGIN = 20  # Dealt cards fly in from this far inside the bottom left
+
+
+def column_at(x, left, card_width):
+    """Column whose cards span `x`, counting from `left`, or None in a gap."""
+    column, within = divmod(int(x) - left, card_width + HOUSE_GAP)
+    if column < 0 or within >= card_width:
+        return None
+    return column
+
+
+def pile_index(y, top, count, spacing, card_height):
+    """Index of the card at height `y` in a pile of `count`, or None if off it.
+
+    Each card shows a strip `spacing` high above the next, and the last one
+    shows in full.
+    """
+    offset = int(y) - top
+    if count == 0 or offset < 0 or offset >= (count - 1) * spacing + card_height:
+        return None
+    return min(offset // spacing, count - 1)
+
+
+class Layout:
+    """Table geometry for one card size and canvas height.
+
+    `canvas_height` is None until the canvas has a real size, and columns are
+    then never compressed. A column stops short of the end houses when it
+    runs above them, else of the bottom of the canvas. The end houses move up
+    from END_HOUSE_TOP as far as needed to keep a full pile on the canvas,
+    squeezed like a long column.
+    """
+
+    def __init__(self, card_width, card_height, zoom_factor, canvas_height=None):
+        self.card_width = card_width
+        self.card_height = card_height
+        self.canvas_height = canvas_height
+        self.pitch = card_width + HOUSE_GAP
+        self.stack_spacing = int(STACK_SPACING * zoom_factor)
+        self.end_house_top = END_HOUSE_TOP
+        self.end_house_spacing = int(END_HOUSE_SPACING * zoom_factor)
+        if canvas_height is not None:
+            bottom = canvas_height - HOUSE_GAP
+            self.end_house_top = max(
+                HOUSE_TOP + card_height + HOUSE_GAP,
+                min(END_HOUSE_TOP, bottom - card_height - 12 * MIN_STACK_SPACING),
+            )
+            fits = (bottom - self.end_house_top - card_height) // 12
+            self.end_house_spacing = max(
+                MIN_STACK_SPACING, min(self.end_house_spacing, fits)
+            )
+
+        self.house_lefts = [
+            HOUSE_LEFT + i * self.pitch for i in range(engine.HOUSE_COUNT)
+        ]
+        self.end_house_lefts = [
+            END_HOUSE_LEFT + suit * self.pitch for suit in range(engine.END_HOUSE_COUNT)
+        ]
+        end_houses_right = self.end_house_lefts[-1] + card_width
+
+        # house_tops[i][count] holds the tops of the cards of house i when it
+        # holds `count` cards
+        self.spacings = []
+        self.house_tops = []
+        for left in self.house_lefts:
+            if left < end_houses_right and left + card_width > END_HOUSE_LEFT:
+                bottom = self.end_house_top - HOUSE_GAP
+            elif canvas_height is not None:
+                bottom = canvas_height - HOUSE_GAP
+            else:
+                bottom = None
+            spacings = [self.column_spacing(count, bottom) for count in range(53)]
+            self.spacings.append(spacings)
+            self.house_tops.append(
+                [
+                    tuple(HOUSE_TOP + i * spacing for i in range(count))
+                    for count, spacing in enumerate(spacings)
+                ]
+            )
+        self.end_house_tops = tuple(
+            self.end_house_top + i * self.end_house_spacing for i in range(13)
+        )
+
+    def column_spacing(self, count, bottom):
+        if bottom is None or count < 2:
+            return self.stack_spacing
+        fits = (bottom - HOUSE_TOP - self.card_height) // (count - 1)
+        return max(MIN_STACK_SPACING, min(self.stack_spacing, fits))
+
+    def house_slots(self):
+        """(x, y) of the top left corner of each house's outline."""
+        return [(left, HOUSE_TOP) for left in self.house_lefts]
+
+    def end_house_slots(self):
+        """(x, y) of the top left corner of each end house's outline."""
+        return [(left, self.end_house_top) for left in self.end_house_lefts]
+
+    def deal_origin(self):
+        """Where dealt cards fly in from."""
+        if self.canvas_height is None:
+            return DEAL_MARGIN, DEAL_MARGIN
+        return DEAL_MARGIN, max(
+            DEAL_MARGIN, self.canvas_height - self.card_height - DEAL_MARGIN
+        )
+
+    def card_groups(self, state):
+        """Every card's position, grouped per house and end house for the renderer."""
+        groups = []
+        for left, tops, house in zip(self.house_lefts, self.house_tops, state.houses):
+            groups.append(
+                [(card, left, top) for card, top in zip(house, tops[len(house)])]
+            )
+        for suit, left in enumerate(self.end_house_lefts):
+            cards = engine.end_house_cards(state, suit)
+            groups.append(
+                [(card, left, top) for card, top in zip(cards, self.end_house_tops)]
+            )
+        return groups
+
+    def card_at(self, state, x, y):
+        """(house index, card index) of the house card at (x, y), or (None, None)."""
+        house_index = column_at(x, HOUSE_LEFT, self.card_width)
+        if house_index is None or house_index >= engine.HOUSE_COUNT:
+            return None, None
+        count = len(state.houses[house_index])
+        index = pile_index(
+            y,
+            HOUSE_TOP,
+            count,
+            self.spacings[house_index][count],
+            self.card_height,
+        )
+        if index is None:
+            return None, None
+        return house_index, index
+
+    def drop_target(self, state, x, y):
+        """Move target for a card whose centre is dropped at (x, y).
+
+        An end house counts only when the card lands on it; anywhere else the
+        nearest house is the target, as a drop between columns is still meant
+        for one of them.
+        """
+        suit = column_at(x, END_HOUSE_LEFT, self.card_width)
+        if suit is not None and suit < engine.END_HOUSE_COUNT:
+            count = max(state.end_houses[suit], 1)  # An empty pile is one slot
+            if (
+                pile_index(
+                    y,
+                    self.end_house_top,
+                    count,
+                    self.end_house_spacing,
+                    self.card_height,
+                )
+                is not None
+            ):
+                return engine.FOUNDATION + suit
+
+        house_index = (
+            int(x) - HOUSE_LEFT - self.card_width // 2 + self.pitch // 2
+        ) // self.pitch
+        return min(max(house_index, 0), engine.HOUSE_COUNT - 1)
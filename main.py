@@ -1,8 +1,42 @@
-from game import PatienceGame
-import tkinter as tk
+import multiprocessing
+import sys
+
+from startup_profile import profiler
+
+
+def report_startup(root):
+    print(profiler.report())
+    print(profiler.as_json())
+    root.destroy()
+
+
+def main(argv):
+    profile_startup = "--profile-startup" in argv
+    if profile_startup:
+        profiler.start()
+
+    # --trace FILE records a performance trace until the window is closed
+    if "--trace" in argv[:-1]:
+        from perf_hud import perf
+
+        perf.start_recording(argv[argv.index("--trace") + 1])
+
+    with profiler.phase("imports"):
+        import tkinter as tk
+        from game import PatienceGame
 
-if __name__ == "__main__":
     root = tk.Tk()
-    game = PatienceGame(root)
+    if profile_startup:
+        profiler.on_finish = lambda profiler: report_startup(root)
+    # Profiling runs stay off the network
+    game = PatienceGame(root, check_updates=not profile_startup)
     root.protocol("WM_DELETE_WINDOW", game.on_closing)
     root.mainloop()
+
+
+# Spawned worker processes import this module too, so nothing may run at the
+# top level: they must not load Tk or the game, start profiling or tracing
+if __name__ == "__main__":
+    # Lets the hint worker process start from a PyInstaller build
+    multiprocessing.freeze_support()
+    main(sys.argv[1:])
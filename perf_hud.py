@@ -0,0 +1,220 @@
+"""Live performance overlay and trace recording.
+
+F12 toggles an overlay with frame time, event-loop lag, the last
+display_cards and solver times and the canvas item count. Ctrl+F12 starts
+and stops recording a trace in Chrome's JSON format, which opens in
+chrome://tracing or https://ui.perfetto.dev; `python main.py --trace FILE`
+records from startup until the window closes.
+
+With both off, span() returns one shared no-op context manager and no
+heartbeat is scheduled, so the instrumentation can stay in release builds.
+"""
+
+from collections import deque
+from contextlib import nullcontext
+import json
+import os
+import threading
+import time
+import tkinter as tk
+
+# The heartbeat asks for one tick per display frame; any delay beyond that
+# is time the event loop spent busy
+HEARTBEAT_MS = 16
+# Seconds between overlay redraws, so the overlay barely shows in the trace
+HUD_REFRESH = 0.25
+# Heartbeats the overlay averages over
+WINDOW = 60
+
+NULL_SPAN = nullcontext()
+
+
+class Span:
+    __slots__ = ("monitor", "name", "start")
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.monitor.add_span(self.name, self.start, time.perf_counter())
+
+
+class PerfMonitor:
+    def __init__(self):
+        self.enabled = False  # Overlay visible or a trace recording
+        self.hud_visible = False
+        self.recording = False
+        self.trace_path = None
+        self.origin = time.perf_counter()
+        self.events = []
+        self.last = {}  # Span name -> seconds its latest run took
+
+    def update_enabled(self):
+        self.enabled = self.hud_visible or self.recording
+
+    def span(self, name):
+        return Span(self, name) if self.enabled else NULL_SPAN
+
+    def micros(self, seconds):
+        return round((seconds - self.origin) * 1e6, 1)
+
+    def add_span(self, name, start, end):
+        self.last[name] = end - start
+        if self.recording:
+            self.events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": self.micros(start),
+                    "dur": round((end - start) * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }
+            )
+
+    def counter(self, name, values):
+        if self.recording:
+            self.events.append(
+                {
+                    "name": name,
+                    "ph": "C",
+                    "ts": self.micros(time.perf_counter()),
+                    "pid": os.getpid(),
+                    "args": values,
+                }
+            )
+
+    def start_recording(self, path=None):
+        self.events = []
+        self.trace_path = path
+        self.recording = True
+        self.update_enabled()
+
+    def stop_recording(self):
+        """Write the trace and return its path, or None if it could not be saved."""
+        self.recording = False
+        self.update_enabled()
+        path = self.trace_path or os.path.join(
+            os.path.expanduser("~"),
+            time.strftime("patience-trace-%Y%m%d-%H%M%S.json"),
+        )
+        events, self.events = self.events, []
+        try:
+            with open(path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        except OSError:
+            print(f"Failed to write performance trace to {path}")
+            return None
+        return path
+
+
+perf = PerfMonitor()
+
+
+class PerfHUD:
+    """Overlay drawn on the game canvas, plus the heartbeat that measures lag.
+
+    Frame time is the interval between heartbeats, so a slow handler shows
+    up both as a long frame and as lag.
+    """
+
+    def __init__(self, master, canvas, monitor=perf):
+        self.master = master
+        self.canvas = canvas
+        self.monitor = monitor
+        self.after_id = None
+        self.last_tick = 0.0
+        self.last_draw = 0.0
+        self.frames = deque(maxlen=WINDOW)
+        self.text_item = None
+        self.background_item = None
+
+    def toggle(self):
+        self.monitor.hud_visible = not self.monitor.hud_visible
+        self.monitor.update_enabled()
+        if self.monitor.hud_visible:
+            self.draw()
+        else:
+            self.canvas.delete("perf_hud")
+            self.text_item = self.background_item = None
+        self.update_heartbeat()
+
+    def update_heartbeat(self):
+        """Run the heartbeat only while the overlay is shown or a trace records."""
+        if self.monitor.enabled and self.after_id is None:
+            self.frames.clear()
+            self.last_tick = time.perf_counter()
+            self.after_id = self.master.after(HEARTBEAT_MS, self.tick)
+        elif not self.monitor.enabled and self.after_id is not None:
+            self.master.after_cancel(self.after_id)
+            self.after_id = None
+
+    def tick(self):
+        self.after_id = None
+        if not self.monitor.enabled:
+            return
+        now = time.perf_counter()
+        frame = now - self.last_tick
+        self.last_tick = now
+        self.frames.append(frame)
+        self.monitor.counter(
+            "frame",
+            {
+                "frame_ms": round(frame * 1000, 2),
+                "lag_ms": round(max(0.0, frame * 1000 - HEARTBEAT_MS), 2),
+            },
+        )
+        if self.monitor.hud_visible and now - self.last_draw >= HUD_REFRESH:
+            self.draw()
+        self.after_id = self.master.after(HEARTBEAT_MS, self.tick)
+
+    def item_count(self):
+        count = len(self.canvas.find_all())
+        return count - len(self.canvas.find_withtag("perf_hud"))
+
+    def draw(self):
+        self.last_draw = time.perf_counter()
+        frames = [frame * 1000 for frame in self.frames] or [0.0]
+        average = sum(frames) / len(frames)
+        lags = [max(0.0, frame - HEARTBEAT_MS) for frame in frames]
+
+        def milliseconds(name):
+            seconds = self.monitor.last.get(name)
+            return "-" if seconds is None else f"{seconds * 1000:.2f} ms"
+
+        lines = [
+            f"frame          {average:6.1f} ms  (worst {max(frames):.1f})",
+            f"loop lag       {sum(lags) / len(lags):6.1f} ms  (worst {max(lags):.1f})",
+            f"display_cards  {milliseconds('display_cards')}",
+            f"canvas items   {self.item_count()}",
+            f"solver         {milliseconds('solver')}",
+        ]
+        if self.monitor.recording:
+            lines.append("recording trace (Ctrl+F12 to save)")
+        text = "\n".join(lines)
+
+        x = self.canvas.winfo_width() - 10
+        if self.text_item is None:
+            self.background_item = self.canvas.create_rectangle(
+                0, 0, 0, 0, fill="black", outline="", tags="perf_hud"
+            )
+            self.text_item = self.canvas.create_text(
+                x,
+                10,
+                anchor=tk.NE,
+                fill="#7CFC00",
+                font=("Courier", 10),
+                tags="perf_hud",
+            )
+        self.canvas.itemconfig(self.text_item, text=text)
+        self.canvas.coords(self.text_item, x, 10)
+        left, top, right, bottom = self.canvas.bbox(self.text_item)
+        self.canvas.coords(
+            self.background_item, left - 6, top - 4, right + 6, bottom + 4
+        )
+        self.canvas.tag_raise("perf_hud")
@@ -0,0 +1,64 @@
+import tkinter as tk
+
+
+class CardRenderer:
+    """Keeps one canvas image item per card and only touches what changed.
+
+    A layout is a list of groups (one per house or end house), each a list of
+    (card, x, y) from the bottom card up. Cards within a group overlap, so
+    once a card in a group moves, every card painted after it in that group
+    is raised again to keep the stacking order right.
+    """
+
+    def __init__(self, canvas, images):
+        self.canvas = canvas
+        self.images = images
+        self.items = {}  # card -> canvas item
+        self.positions = {}  # card -> (x, y) as last rendered
+
+    def render(self, groups):
+        canvas = self.canvas
+        shown = set()
+
+        for group in groups:
+            restack = False
+            for card, x, y in group:
+                shown.add(card)
+                item = self.items.get(card)
+                if item is None:
+                    # New items are created on top, so later ones must follow
+                    item = canvas.create_image(
+                        x, y, image=self.images[card], anchor=tk.NW, tags="card"
+                    )
+                    self.items[card] = item
+                    restack = True
+                elif self.positions.get(card) != (x, y):
+                    canvas.coords(item, x, y)
+                    canvas.tag_raise(item)
+                    restack = True
+                elif restack:
+                    canvas.tag_raise(item)
+                self.positions[card] = (x, y)
+
+        for card in [card for card in self.items if card not in shown]:
+            self.remove(card)
+
+    def remove(self, card):
+        item = self.items.pop(card)
+        self.positions.pop(card, None)
+        self.canvas.delete(item)
+
+    def invalidate(self, cards):
+        """Forget where `cards` were drawn, e.g. after they were dragged."""
+        for card in cards:
+            self.positions.pop(card, None)
+
+    def set_images(self, images):
+        self.images = images
+        for card, item in self.items.items():
+            self.canvas.itemconfig(item, image=images[card])
+
+    def clear(self):
+        self.canvas.delete("card")
+        self.items.clear()
+        self.positions.clear()
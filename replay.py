@@ -0,0 +1,222 @@
+"""Recorded games and a headless replayer.
+
+Every game played is appended to GAMES_PATH as one JSON line: the deal
+number, the moves as a compact base64 log, the result, the move counter
+shown to the player and a fingerprint of the final position.
+
+    python replay.py ~/.patience_games.jsonl
+    python replay.py games.jsonl --profile
+
+re-executes each game against the rules engine, checking that every move is
+legal and that the final position and move count match the recording.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+import engine
+
+GAMES_PATH = os.path.join(os.path.expanduser("~"), ".patience_games.jsonl")
+
+# Each event is a big-endian uint16: source << 10 | index << 4 | target for a
+# move (the card count follows from the position), or one of these
+UNDO = 0xFFFF
+REDO = 0xFFFE
+
+
+class ReplayError(Exception):
+    pass
+
+
+def encode_move(move):
+    return move.source << 10 | move.index << 4 | move.target
+
+
+def encode(events):
+    return base64.b64encode(struct.pack(f">{len(events)}H", *events)).decode("ascii")
+
+
+def decode(text):
+    data = base64.b64decode(text)
+    return struct.unpack(f">{len(data) // 2}H", data)
+
+
+def event_count(text):
+    return (len(text) * 3 // 4 - text.count("=")) // 2
+
+
+def fingerprint(state):
+    data = bytearray()
+    for house in state.houses:
+        data.extend(house)
+        data.append(0xFF)
+    data.extend(state.end_houses)
+    return hashlib.blake2b(bytes(data), digest_size=8).hexdigest()
+
+
+class GameRecorder:
+    """Builds the record of the game in progress and appends it when it ends.
+
+    The move count is kept here, the way replay() counts it, rather than
+    taken from the counter the player sees.
+    """
+
+    def __init__(self, path=GAMES_PATH):
+        self.path = path
+        self.deal_number = None
+        self.events = []
+        self.done = 0  # Moves made and not undone
+        self.undone = 0  # Moves that can be redone
+
+    def start(self, deal_number):
+        self.deal_number = deal_number
+        self.events = []
+        self.done = self.undone = 0
+
+    def move(self, move):
+        if self.deal_number is not None:
+            self.events.append(encode_move(move))
+            self.done += 1
+            self.undone = 0
+
+    def undo(self):
+        if self.deal_number is not None and self.done:
+            self.events.append(UNDO)
+            self.done -= 1
+            self.undone += 1
+
+    def redo(self):
+        if self.deal_number is not None and self.undone:
+            self.events.append(REDO)
+            self.done += 1
+            self.undone -= 1
+
+    def finish(self, state, result):
+        """Save the game, unless none is in progress or no move was made."""
+        if self.deal_number is None or not self.events:
+            self.deal_number = None
+            return
+        record = {
+            "deal": self.deal_number,
+            "moves": encode(self.events),
+            "result": result,
+            "move_count": self.done,
+            "final": fingerprint(state),
+            "time": round(time.time()),
+        }
+        self.deal_number = None
+        self.events = []
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            print("Failed to save the game record")
+
+
+def replay(record):
+    """Play a record back; return (final state, move count) or raise ReplayError."""
+    state = engine.deal(engine.new_deck(record["deal"]))
+    done = []
+    undone = []
+    for number, event in enumerate(decode(record["moves"]), 1):
+        if event == UNDO:
+            if not done:
+                raise ReplayError(f"event {number}: undo with nothing to undo")
+            move = done.pop()
+            undone.append(move)
+            state = engine.unapply_move(state, move)
+        elif event == REDO:
+            if not undone:
+                raise ReplayError(f"event {number}: redo with nothing to redo")
+            move = undone.pop()
+            done.append(move)
+            state = engine.apply_move(state, move)
+        else:
+            source, index, target = event >> 10, event >> 4 & 0x3F, event & 0xF
+            if source >= engine.HOUSE_COUNT or index >= len(state.houses[source]):
+                raise ReplayError(f"event {number}: no card at {source}/{index}")
+            move = engine.make_move(state, source, index, target)
+            if not engine.is_valid_move(state, move):
+                raise ReplayError(f"event {number}: illegal move {tuple(move)}")
+            state = engine.apply_move(state, move)
+            done.append(move)
+            undone.clear()
+    return state, len(done)
+
+
+def check(record):
+    """Replay and compare with the recorded outcome; return a problem or None."""
+    try:
+        state, move_count = replay(record)
+    except (ReplayError, ValueError, KeyError) as e:
+        return str(e)
+    if move_count != record["move_count"]:
+        return f"{move_count} moves replayed, {record['move_count']} recorded"
+    if fingerprint(state) != record["final"]:
+        return "final position differs"
+    if (record["result"] == "won") != engine.is_won(state):
+        return f"recorded as {record['result']}"
+    return None
+
+
+def read_records(path):
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A torn last line from a crash
+
+
+def replay_file(path):
+    """Check every record in `path`; return (games, events, failures, seconds)."""
+    games = events = 0
+    failures = []
+    started = time.perf_counter()
+    for line_number, record in read_records(path):
+        problem = check(record)
+        games += 1
+        events += event_count(record.get("moves", ""))
+        if problem:
+            failures.append((line_number, record.get("deal"), problem))
+    return games, events, failures, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay recorded games against the rules engine."
+    )
+    parser.add_argument("games", nargs="?", default=GAMES_PATH)
+    parser.add_argument(
+        "--profile", action="store_true", help="print a cProfile report of the run"
+    )
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        import cProfile
+        import pstats
+
+        profile = cProfile.Profile()
+        games, events, failures, seconds = profile.runcall(replay_file, args.games)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+    else:
+        games, events, failures, seconds = replay_file(args.games)
+
+    for line_number, deal_number, problem in failures:
+        print(f"line {line_number} (deal {deal_number}): {problem}")
+    rate = games / seconds if seconds else 0.0
+    print(
+        f"{games - len(failures)}/{games} games replayed cleanly, "
+        f"{events} events, {rate:.0f} games/s"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
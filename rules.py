@@ -2,9 +2,21 @@ import tkinter as tk
 from tkinter import ttk
 import json
 import os
+import threading
+
+# Changes within this many milliseconds are written to disk together
+SAVE_DELAY_MS = 500
 
 
 class RulesManager:
+    """Rules dialog and the single store for saved preferences.
+
+    Preferences are read once. Setters only schedule a save: changes made
+    within SAVE_DELAY_MS are coalesced, and the file is then written on a
+    background thread via a temporary file and a rename, so a slow home
+    directory never stalls the UI. flush() writes any pending change at once.
+    """
+
     def __init__(self, master):
         self.master = master
         self.show_rules_on_startup = tk.BooleanVar(value=True)
@@ -12,9 +24,17 @@ class RulesManager:
         self.is_fullscreen = tk.BooleanVar(value=False)
         self.is_muted = tk.BooleanVar(value=False)
         self.high_score = tk.IntVar(value=0)
+        self.deal_speed = tk.StringVar(value="normal")
+        self.hint_time = tk.DoubleVar(value=2.0)
+        self.auto_play = tk.BooleanVar(value=False)
         self.preferences_file = os.path.join(
             os.path.expanduser("~"), ".patience_preferences.json"
         )
+        self.save_after_id = None
+        self.writer = None  # Latest background write thread
+        self.write_lock = threading.Lock()
+        self.generation = 0  # Bumped for every snapshot handed to a writer
+        self.written_generation = 0
         self.load_preferences()
 
     def show_rules(self):
@@ -58,7 +78,7 @@ Rules of the game:
 4. In the columns, cards must be placed in descending order and alternating colors.
 5. You can move single cards or stacks of correctly sequenced cards between columns.
 6. The game is won when all cards are moved to the foundation piles.
-7. Redeal the cards, or undo the moves (upto 5) if you get stuck.
+7. Redeal the cards, or undo and redo moves if you get stuck.
 
 Good luck and enjoy the game!"""
 
@@ -98,19 +118,66 @@ Good luck and enjoy the game!"""
                 self.is_fullscreen.set(prefs.get("is_fullscreen", False))
                 self.is_muted.set(prefs.get("is_muted", False))
                 self.high_score.set(prefs.get("high_score", 0))
-        except FileNotFoundError:
-            pass  # Use default values if file doesn't exist
-
-    def save_preferences(self):
-        prefs = {
+                self.deal_speed.set(prefs.get("deal_speed", "normal"))
+                self.hint_time.set(prefs.get("hint_time", 2.0))
+                self.auto_play.set(prefs.get("auto_play", False))
+        except (OSError, ValueError):
+            pass  # Use default values if file doesn't exist or is unreadable
+
+    def snapshot(self):
+        return {
             "show_rules_on_startup": self.show_rules_on_startup.get(),
             "zoom_factor": self.zoom_factor.get(),
             "is_fullscreen": self.is_fullscreen.get(),
             "is_muted": self.is_muted.get(),
             "high_score": self.high_score.get(),
+            "deal_speed": self.deal_speed.get(),
+            "hint_time": self.hint_time.get(),
+            "auto_play": self.auto_play.get(),
         }
-        with open(self.preferences_file, "w") as f:
-            json.dump(prefs, f)
+
+    def save_preferences(self):
+        """Schedule a write, restarting the delay if one is already pending."""
+        if self.save_after_id is not None:
+            self.master.after_cancel(self.save_after_id)
+        self.save_after_id = self.master.after(SAVE_DELAY_MS, self.write_in_background)
+
+    def write_in_background(self):
+        self.save_after_id = None
+        # Tk variables may only be read here, on the UI thread
+        self.generation += 1
+        self.writer = threading.Thread(
+            target=self.write_preferences,
+            args=(self.snapshot(), self.generation),
+            daemon=True,
+        )
+        self.writer.start()
+
+    def flush(self):
+        """Write pending changes now; call before the window is destroyed."""
+        if self.save_after_id is not None:
+            self.master.after_cancel(self.save_after_id)
+            self.save_after_id = None
+            self.generation += 1
+            self.write_preferences(self.snapshot(), self.generation)
+        # A daemon writer would be killed mid-write when the process exits
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+    def write_preferences(self, prefs, generation):
+        with self.write_lock:
+            if generation < self.written_generation:
+                return  # A newer snapshot is already on disk
+            temp_file = self.preferences_file + ".tmp"
+            try:
+                with open(temp_file, "w") as f:
+                    json.dump(prefs, f)
+                os.replace(temp_file, self.preferences_file)
+            except OSError:
+                print("Failed to save preferences")
+                return
+            self.written_generation = generation
 
     def get_high_score(self):
         return self.high_score.get()
@@ -139,3 +206,24 @@ Good luck and enjoy the game!"""
     def set_is_muted(self, value):
         self.is_muted.set(value)
         self.save_preferences()
+
+    def get_deal_speed(self):
+        return self.deal_speed.get()
+
+    def set_deal_speed(self, value):
+        self.deal_speed.set(value)
+        self.save_preferences()
+
+    def get_hint_time(self):
+        return self.hint_time.get()
+
+    def set_hint_time(self, value):
+        self.hint_time.set(value)
+        self.save_preferences()
+
+    def get_auto_play(self):
+        return self.auto_play.get()
+
+    def set_auto_play(self, value):
+        self.auto_play.set(value)
+        self.save_preferences()
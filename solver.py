@@ -0,0 +1,156 @@
+"""Best-first solver for Patience positions.
+
+The search works on engine States, so it runs headless and can be used from
+worker processes. Positions that differ only in the order of the houses are
+the same position, so the transposition table is keyed on a canonical form.
+"""
+
+from collections import namedtuple
+import heapq
+import time
+
+import engine
+from engine import ACCEPTS, FOUNDATION, RANK
+
+DEFAULT_NODE_LIMIT = 200000
+DEFAULT_TIME_LIMIT = 5.0
+
+# `solvable` is True or False when the search finished, None when it ran out
+# of budget. `moves` is the full winning sequence when solvable.
+SolveResult = namedtuple("SolveResult", ["solvable", "moves", "nodes", "elapsed"])
+
+
+def canonical_key(state):
+    """Hash key shared by every position that only reorders the houses."""
+    return tuple(sorted(state.houses)), state.end_houses
+
+
+def heuristic(state):
+    """Count of cards sitting on a card they could not be moved onto, plus
+    houses that are not built on a King. Lower is closer to a win."""
+    count = 0
+    for house in state.houses:
+        if house and RANK[house[0]] != 13:
+            count += 1
+        for i in range(1, len(house)):
+            if house[i - 1] not in ACCEPTS[house[i]]:
+                count += 1
+    return count
+
+
+def score_move(state, move):
+    """Move ordering: higher scores are searched first."""
+    houses = state.houses
+    source, index, target, count = move
+    if target >= FOUNDATION:
+        return 100
+    score = 0
+    if index > 0:
+        parent = houses[source][index - 1]
+        if parent in ACCEPTS[houses[source][index]]:
+            # Only switches the run to a new parent, rarely useful
+            score -= 20
+        else:
+            score += 10
+        if RANK[parent] == state.end_houses[parent // 13] + 1:
+            score += 50  # Exposes a card that can go home
+    else:
+        score += 30  # Empties a house
+    if not houses[target]:
+        score -= 40
+    return score + count
+
+
+def ordered_moves(state):
+    houses = state.houses
+    first_empty = next((i for i, house in enumerate(houses) if not house), None)
+    moves = []
+    for move in engine.legal_moves(state):
+        source, index, target, count = move
+        if target < FOUNDATION and not houses[target]:
+            if index == 0 or target != first_empty:
+                # Moving a whole house into an empty one changes nothing, and
+                # every empty house leads to the same canonical position
+                continue
+        moves.append(move)
+    moves.sort(key=lambda move: score_move(state, move), reverse=True)
+    return moves
+
+
+class Solver:
+    def __init__(
+        self,
+        node_limit=DEFAULT_NODE_LIMIT,
+        time_limit=DEFAULT_TIME_LIMIT,
+        cancelled=None,
+    ):
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        # Polled with the clock; when it returns True the search gives up
+        self.cancelled = cancelled
+        self.nodes = 0
+
+    def solve(self, state):
+        """Best-first search, always expanding the least disordered position."""
+        start_time = time.perf_counter()
+        deadline = None if self.time_limit is None else start_time + self.time_limit
+        self.nodes = 0
+
+        def result(solvable, moves=None):
+            elapsed = time.perf_counter() - start_time
+            return SolveResult(solvable, moves or [], self.nodes, elapsed)
+
+        if engine.is_won(state):
+            return result(True)
+
+        # Transposition table: canonical key -> (parent state, move into it)
+        seen = {canonical_key(state): None}
+        queue = [(heuristic(state), 0, state)]
+        counter = 0
+
+        while queue:
+            node_state = heapq.heappop(queue)[2]
+            for move in self.expand(node_state):
+                child = engine.apply_move(node_state, move)
+                key = canonical_key(child)
+                if key in seen:
+                    continue
+                seen[key] = (node_state, move)
+
+                self.nodes += 1
+                if engine.is_won(child):
+                    return result(True, self.path_to(seen, key))
+                if self.node_limit is not None and self.nodes >= self.node_limit:
+                    return result(None)
+                if self.nodes % 1024 == 0 and self.should_stop(deadline):
+                    return result(None)
+
+                counter += 1
+                heapq.heappush(queue, (heuristic(child), counter, child))
+
+        return result(False)
+
+    def should_stop(self, deadline):
+        if deadline is not None and time.perf_counter() > deadline:
+            return True
+        return self.cancelled is not None and self.cancelled()
+
+    @staticmethod
+    def path_to(seen, key):
+        moves = []
+        while seen[key] is not None:
+            parent, move = seen[key]
+            moves.append(move)
+            key = canonical_key(parent)
+        moves.reverse()
+        return moves
+
+    def expand(self, state):
+        safe_move = engine.find_safe_move(state)
+        if safe_move is not None:
+            return [safe_move]
+        return ordered_moves(state)
+
+
+def solve(state, node_limit=DEFAULT_NODE_LIMIT, time_limit=DEFAULT_TIME_LIMIT):
+    return Solver(node_limit, time_limit).solve(state)
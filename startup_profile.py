@@ -0,0 +1,66 @@
+"""Per-phase timing of startup, enabled with `python main.py --profile-startup`.
+
+When disabled, `phase` is a bare context manager and `record` returns at
+once, so the calls can stay in release builds.
+"""
+
+from contextlib import contextmanager
+import json
+import time
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.phases = []
+        self.on_finish = None
+
+    def start(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def record(self, name, since):
+        """Record a phase that started at perf_counter() value `since`."""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - since))
+
+    def total(self):
+        return time.perf_counter() - self.origin
+
+    def finish(self):
+        if not self.enabled:
+            return
+        self.enabled = False  # Later zooms and reloads are not startup
+        if self.on_finish is not None:
+            self.on_finish(self)
+
+    def report(self):
+        lines = ["Startup profile:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<12} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<12} {self.total() * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def as_json(self):
+        return json.dumps(
+            {
+                "phases": {name: round(seconds, 6) for name, seconds in self.phases},
+                "total": round(self.total(), 6),
+            }
+        )
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,59 @@
+import random
+
+import engine
+
+
+def check(index, state):
+    assert sorted(index.legal_moves()) == sorted(engine.legal_moves(state))
+    assert index.has_legal_move() == engine.has_legal_move(state)
+    assert index.is_won() == engine.is_won(state)
+    assert index.is_forced_win() == engine.is_forced_win(state)
+    for move in engine.legal_moves(state):
+        assert index.is_legal(move)
+    for source, house in enumerate(state.houses):
+        for i in range(len(house) + 1):
+            assert index.is_movable(source, i) == (
+                i < len(house) and len(house) - i <= engine.run_length(house)
+            )
+
+
+def test_dealing_card_by_card():
+    deck = engine.new_deck(1)
+    state = engine.EMPTY_STATE
+    index = engine.MoveIndex()
+    for house_index, count in enumerate(engine.HOUSE_CARD_COUNTS):
+        for _ in range(count):
+            state = engine.add_card(state, house_index, deck.pop())
+            index.update(state)
+            check(index, state)
+    assert state == engine.deal(engine.new_deck(1))
+
+
+def test_random_play_with_undo_matches_legal_moves():
+    rng = random.Random(0)
+    for seed in range(30):
+        state = engine.deal(engine.new_deck(seed))
+        index = engine.MoveIndex(state)
+        check(index, state)
+        history = []
+        for _ in range(150):
+            moves = engine.legal_moves(state)
+            if history and (not moves or rng.random() < 0.2):
+                state = engine.unapply_move(state, history.pop())
+            elif moves:
+                move = rng.choice(moves)
+                history.append(move)
+                state = engine.apply_move(state, move)
+            else:
+                break
+            index.update(state)
+            check(index, state)
+
+
+def test_jump_to_unrelated_position():
+    index = engine.MoveIndex(engine.deal(engine.new_deck(2)))
+    state = engine.deal(engine.new_deck(3))
+    index.update(state)
+    check(index, state)
+    index.update(engine.EMPTY_STATE)
+    check(index, engine.EMPTY_STATE)
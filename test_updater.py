@@ -0,0 +1,95 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+
+import pytest
+
+from updater import Updater
+
+ETAG = '"release-1"'
+RELEASE = {"tag_name": "v2.1.0", "html_url": "https://example.com/v2.1.0"}
+
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    """Serves RELEASE with an ETag, and 304 to requests that send it back."""
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body = json.dumps(RELEASE).encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(("127.0.0.1", 0), ReleaseHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_updater(server, tmp_path, version="v2.0.0"):
+    host, port = server.server_address
+    return Updater(
+        version,
+        api_url=f"http://{host}:{port}/releases/latest",
+        cache_path=str(tmp_path / "latest_release.json"),
+        timeout=(1, 1),
+    )
+
+
+def test_first_check_fetches_and_caches_the_etag(server, tmp_path):
+    updater = make_updater(server, tmp_path)
+    info = updater.check_for_updates(force=True)
+    assert info.available and info.version == "v2.1.0" and info.error is None
+    assert "If-None-Match" not in server.requests[0]
+    assert updater.load_cache()["etag"] == ETAG
+
+
+def test_revalidation_sends_the_etag_and_uses_the_cache_on_304(server, tmp_path):
+    updater = make_updater(server, tmp_path)
+    updater.check_for_updates(force=True)
+    info = updater.check_for_updates(force=True)
+    assert len(server.requests) == 2
+    assert server.requests[1]["If-None-Match"] == ETAG
+    assert info.version == "v2.1.0" and info.url == RELEASE["html_url"]
+
+
+def test_recent_cache_skips_the_network(server, tmp_path):
+    updater = make_updater(server, tmp_path)
+    updater.check_for_updates(force=True)
+    updater.check_for_updates()
+    assert len(server.requests) == 1
+
+
+def test_unreachable_server_reports_an_error(tmp_path):
+    updater = Updater(
+        "v2.0.0",
+        api_url="http://127.0.0.1:9/releases/latest",
+        cache_path=str(tmp_path / "latest_release.json"),
+        timeout=(1, 1),
+    )
+    info = updater.check_for_updates(force=True)
+    assert not info.available and info.error
+
+
+def test_version_comparison():
+    updater = Updater("v1.9.0")
+    assert updater.is_newer_version("v1.10.0")
+    assert not updater.is_newer_version("v1.9.0")
+    assert not updater.is_newer_version("v1.8.12")
@@ -1,75 +1,256 @@
-import requests
-from tkinter import Tk, Label, Button
+from collections import namedtuple
+import json
+import os
+import queue
+import re
 import threading
 import time
-import webbrowser
+from tkinter import Tk, Toplevel, Label, Button
+
+GITHUB_API_URL = "https://api.github.com/repos/depleur/patience/releases/latest"
+
+# Last release response, its validators and when it was fetched
+CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".patience_cache", "latest_release.json"
+)
+
+# (connect, read) timeouts in seconds
+TIMEOUT = (3.05, 5)
+# Automatic checks hit the network at most this often, across restarts
+CHECK_INTERVAL = 3600
+# How often the UI thread looks for finished checks
+POLL_MS = 250
+
+UpdateInfo = namedtuple("UpdateInfo", ["available", "version", "url", "error"])
 
 
 class Updater:
-    def __init__(self, current_version, master=None):
+    """Checks GitHub for a newer release without ever blocking the UI.
+
+    Checks run on daemon threads with strict timeouts and never touch Tk:
+    results go through a queue that the Tk thread polls with after() only
+    while a check is outstanding. Periodic checks are timed with after() too,
+    so between them nothing runs. Responses are cached on disk and revalidated with ETag / If-Modified-Since, and
+    automatic checks reuse the cache while it is younger than CHECK_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        current_version,
+        master=None,
+        api_url=GITHUB_API_URL,
+        cache_path=CACHE_PATH,
+        timeout=TIMEOUT,
+        interval=CHECK_INTERVAL,
+    ):
         self.current_version = current_version
         self.master = master
-        self.github_api_url = (
-            "https://api.github.com/repos/depleur/patience/releases/latest"
-        )
+        self.github_api_url = api_url
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.interval = interval
         self.update_thread = None
-        self.stop_thread = False
+        self.stop_event = threading.Event()
+        self.results = queue.Queue()
+        self.poll_after_id = None
+        self.check_after_id = None  # Next periodic check
+        self.pending = 0  # Background checks whose result has not been handled
+        self.notified_version = None
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
 
-    def check_for_updates(self):
+    def save_cache(self, cache):
         try:
-            response = requests.get(self.github_api_url)
-            response.raise_for_status()
-            latest_release = response.json()
-            latest_version = latest_release["tag_name"]
-
-            if self.is_newer_version(latest_version):
-                self.notify_update_available(latest_version, latest_release["html_url"])
-                return True
-            return False
-        except requests.RequestException:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(cache, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass  # The cache is only an optimisation
+
+    def fetch_latest_release(self, force=False):
+        """Return {"tag_name", "html_url"} of the latest release, or None.
+
+        Without `force`, a cached answer younger than the check interval is
+        returned without touching the network.
+        """
+        cache = self.load_cache()
+        now = time.time()
+        if (
+            not force
+            and cache is not None
+            and 0 <= now - cache.get("checked_at", 0) < self.interval
+        ):
+            return cache["release"]
+
+        import requests  # Slow to import, and only needed once the UI is up
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache is not None:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+
+        try:
+            response = requests.get(
+                self.github_api_url, headers=headers, timeout=self.timeout
+            )
+            if response.status_code == 304 and cache is not None:
+                release = cache["release"]
+            else:
+                response.raise_for_status()
+                latest_release = response.json()
+                release = {
+                    "tag_name": latest_release["tag_name"],
+                    "html_url": latest_release["html_url"],
+                }
+        except (requests.RequestException, ValueError, KeyError):
             print("Failed to check for updates")
-            return False
+            return None
+
+        previous = cache or {}
+        self.save_cache(
+            {
+                "release": release,
+                "etag": response.headers.get("ETag", previous.get("etag")),
+                "last_modified": response.headers.get(
+                    "Last-Modified", previous.get("last_modified")
+                ),
+                "checked_at": now,
+            }
+        )
+        return release
+
+    def check_for_updates(self, force=False):
+        """Blocking check returning an UpdateInfo; run it off the UI thread."""
+        release = self.fetch_latest_release(force)
+        if release is None:
+            return UpdateInfo(False, None, None, "Failed to check for updates")
+        latest_version = release["tag_name"]
+        return UpdateInfo(
+            self.is_newer_version(latest_version),
+            latest_version,
+            release["html_url"],
+            None,
+        )
+
+    @staticmethod
+    def version_key(version):
+        return [int(part) for part in re.findall(r"\d+", version.split("-")[0])]
 
     def is_newer_version(self, latest_version):
-        current = [x for x in self.current_version[1:].split(".")]
-        latest = [x for x in latest_version[1:].split(".")]
-        return latest > current
+        return self.version_key(latest_version) > self.version_key(self.current_version)
+
+    def check_in_background(self, callback=None, force=False):
+        """Check on a daemon thread; `callback(info)` then runs on the UI thread."""
+
+        def run():
+            self.deliver(self.check_for_updates(force), callback, counted=True)
+
+        self.pending += 1
+        threading.Thread(target=run, daemon=True).start()
+        self.schedule_poll()
+
+    def deliver(self, info, callback, counted=False):
+        """Called on worker threads; `counted` for results of check_in_background."""
+        if self.master is None:
+            self.handle_result(info, callback)
+        else:
+            self.results.put((info, callback, counted))
+
+    def handle_result(self, info, callback):
+        if callback:
+            callback(info)
+        elif info.available and info.version != self.notified_version:
+            self.notify_update_available(info.version, info.url)
+
+    def schedule_poll(self):
+        if self.master is not None and self.poll_after_id is None:
+            self.poll_after_id = self.master.after(POLL_MS, self.poll_results)
+
+    def poll_results(self):
+        self.poll_after_id = None
+        while True:
+            try:
+                info, callback, counted = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if counted:
+                self.pending -= 1
+            self.handle_result(info, callback)
+
+        if self.pending:
+            self.schedule_poll()
 
     def notify_update_available(self, new_version, download_url):
+        self.notified_version = new_version
         if self.master:
-            self.master.after(
-                0, lambda: self.show_custom_update_dialog(new_version, download_url)
-            )
+            self.show_custom_update_dialog(new_version, download_url)
         else:
             print(f"A new version ({new_version}) is available!")
             print(f"You can download it from: {download_url}")
 
     def show_custom_update_dialog(self, new_version, download_url):
-        dialog = Tk()
+        dialog = Toplevel(self.master) if self.master else Tk()
         dialog.title("Update Available")
         dialog.geometry("300x150")
 
         Label(dialog, text=f"A new version ({new_version}) is available!").pack(pady=10)
 
         def open_download_url():
+            import webbrowser
+
             webbrowser.open(download_url)
             dialog.destroy()
 
         Button(dialog, text="Take me there", command=open_download_url).pack(pady=5)
         Button(dialog, text="No thanks", command=dialog.destroy).pack(pady=5)
 
-        dialog.mainloop()
+        if not self.master:
+            dialog.mainloop()
 
     def start_update_check_thread(self):
-        self.update_thread = threading.Thread(target=self.periodic_update_check)
+        """Check now and then every `interval` seconds until stopped.
+
+        Without a Tk master there is no event loop to time the checks, so a
+        daemon thread loops instead.
+        """
+        self.stop_event.clear()
+        if self.master is not None:
+            self.scheduled_check()
+            return
+        self.update_thread = threading.Thread(
+            target=self.periodic_update_check, daemon=True
+        )
         self.update_thread.start()
 
+    def scheduled_check(self):
+        self.check_after_id = self.master.after(
+            int(self.interval * 1000), self.scheduled_check
+        )
+        self.check_in_background()
+
     def stop_update_check_thread(self):
-        self.stop_thread = True
-        if self.update_thread:
-            self.update_thread.join()
+        # The thread is a daemon waiting on the event, so this returns at once
+        self.stop_event.set()
+        if self.master is None:
+            return
+        for after_id in (self.check_after_id, self.poll_after_id):
+            if after_id is not None:
+                self.master.after_cancel(after_id)
+        self.check_after_id = None
+        self.poll_after_id = None
 
     def periodic_update_check(self):
-        while not self.stop_thread:
-            self.check_for_updates()
-            time.sleep(3600)  # Sleep for 1 hour
+        while not self.stop_event.is_set():
+            info = self.check_for_updates()
+            if not self.stop_event.is_set():
+                self.deliver(info, None)
+            self.stop_event.wait(self.interval)